@@ -1,38 +1,122 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.config import get_settings
+from app.utils.http_client import get_http_client
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Optional
 import jwt
-import json
+import orjson
 import base64
+import binascii
+import time
+import logging
 
-settings = get_settings()
+logger = logging.getLogger(__name__)
 security = HTTPBearer()
 
+# Base64 padding indexed by len(payload) % 4
+_B64_PAD = (b'', b'===', b'==', b'=')
 
+# Asymmetric algorithms Supabase signs with when JWT signing keys are enabled
+_JWKS_ALGORITHMS = frozenset({"RS256", "ES256"})
+
+# Supabase signing keys, fetched once at startup by load_jwks()
+_jwks: Optional[jwt.PyJWKSet] = None
+
+
+class AuthUser:
+    """Authenticated user extracted from the token payload."""
+    __slots__ = ('id',)
+
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+@lru_cache(maxsize=4096)
 def decode_token(token: str):
     """
-    Decode JWT token without verification (trusting Supabase).
-    Extract user info from the token payload.
+    Decode JWT token and extract user info from the payload.
+    The signature is verified locally when SUPABASE_JWT_SECRET or
+    SUPABASE_JWKS_URL is configured; otherwise the token is decoded without
+    verification (trusting Supabase).
+
+    Results are cached per token, since the same token is sent with every
+    request of a session. The payload is returned read-only so the cached
+    value can be shared safely.
     """
+    settings = get_settings()
+    if settings.supabase_jwt_secret or settings.supabase_jwks_url:
+        return _verify_token(token)
+
     try:
         # JWT format: header.payload.signature
         # We'll decode the payload (2nd part) without verifying signature
         # since we trust Supabase as the issuer
-        parts = token.split('.')
-        if len(parts) != 3:
+        if token.count('.') != 2:
             return None
 
         # Decode payload (add padding if needed)
-        payload = parts[1]
-        padding = 4 - (len(payload) % 4)
-        if padding != 4:
-            payload += '=' * padding
+        payload = token.split('.')[1].encode('ascii')
+        payload += _B64_PAD[len(payload) & 3]
 
         decoded = base64.urlsafe_b64decode(payload)
-        data = json.loads(decoded)
-        return data
+        data = orjson.loads(decoded)
+        # Claims must be a JSON object (same rule PyJWT applies)
+        if not isinstance(data, dict):
+            return None
+        return MappingProxyType(data)
+    except (ValueError, binascii.Error, orjson.JSONDecodeError) as e:
+        # UnicodeError is a ValueError subclass
+        logger.debug("Token decode error: %s", e)
+        return None
+
+
+async def load_jwks() -> None:
+    """Fetch the Supabase signing keys from SUPABASE_JWKS_URL (call on application startup)."""
+    global _jwks
+    jwks_url = get_settings().supabase_jwks_url
+    if not jwks_url:
+        return
+    try:
+        response = await get_http_client().get(jwks_url, timeout=10.0)
+        response.raise_for_status()
+        _jwks = jwt.PyJWKSet.from_dict(response.json())
     except Exception as e:
-        print(f"Token decode error: {e}")
+        # RS256/ES256 tokens are rejected until the keys are available
+        logger.warning("Failed to load Supabase JWKS: %s", e)
+
+
+def _verify_token(token: str):
+    """
+    Verify token signature locally: HS256 with the Supabase JWT secret, or
+    RS256/ES256 with the matching key from the Supabase JWKS.
+    Expiry is checked by the caller so cached payloads still go stale.
+    """
+    try:
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get("alg")
+        settings = get_settings()
+
+        if algorithm == "HS256" and settings.supabase_jwt_secret:
+            key = settings.supabase_jwt_secret
+        elif algorithm in _JWKS_ALGORITHMS and _jwks is not None:
+            key = _jwks[header.get("kid")].key
+        else:
+            logger.debug("No verification key for token algorithm %s", algorithm)
+            return None
+
+        data = jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience="authenticated",
+            options={"verify_exp": False},
+        )
+        return MappingProxyType(data)
+    except (jwt.InvalidTokenError, KeyError) as e:
+        # KeyError: no JWKS key with the token's kid
+        logger.debug("Token verification error: %s", e)
         return None
 
 
@@ -53,16 +137,19 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
                 detail="Invalid token format",
             )
 
-        # Create a user object with the token info
-        class User:
-            def __init__(self, user_id):
-                self.id = user_id
+        # Checked on every request since decoded payloads are cached
+        exp = payload.get('exp')
+        if exp is not None and exp < time.time():
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token expired",
+            )
 
-        return User(payload['sub'])
+        return AuthUser(payload['sub'])
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Auth error: {e}")
+        logger.warning("Auth error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
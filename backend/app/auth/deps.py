@@ -0,0 +1,10 @@
+"""
+Shared auth dependencies for route signatures.
+"""
+from typing import Annotated
+from fastapi import Depends
+from app.auth.dependencies import AuthUser, get_current_user
+
+# Single shared dependency so every router resolves auth through the same
+# HTTPBearer/get_current_user objects (one cache entry per request)
+CurrentUser = Annotated[AuthUser, Depends(get_current_user)]
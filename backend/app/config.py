@@ -1,6 +1,11 @@
+from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 from typing import List
-from functools import lru_cache
+from functools import lru_cache, cached_property
+
+# Read .env into os.environ once at import; real environment variables win.
+# Settings then only resolves fields from os.environ.
+load_dotenv(".env", override=False)
 
 
 class Settings(BaseSettings):
@@ -42,25 +47,28 @@ class Settings(BaseSettings):
     backend_url: str = "http://localhost:8000"
     environment: str = "development"
     
+    # Supabase auth token verification (optional). When either is set, tokens are
+    # verified locally; otherwise they're decoded as-is, trusting Supabase.
+    supabase_jwt_secret: str = ""  # HS256 JWT secret (Project Settings > API)
+    supabase_jwks_url: str = ""  # JWKS for asymmetric keys, e.g. <SUPABASE_URL>/auth/v1/.well-known/jwks.json
+    
     # Security (optional for future use)
     jwt_secret_key: str = ""
     
     class Config:
-        env_file = ".env"
         case_sensitive = False
         extra = "ignore"  # Ignore extra fields from .env (e.g., VITE_ prefixed frontend vars)
     
-    @property
+    @cached_property
     def cors_origins_list(self) -> List[str]:
-        """Convert comma-separated CORS origins to list."""
+        """Convert comma-separated CORS origins to list (computed once)."""
         return [origin.strip() for origin in self.cors_origins.split(",")]
 
 
-# Settings factory - no caching to pick up .env changes
+# Settings factory - cached so .env is parsed and validated once per process
+@lru_cache(maxsize=1)
 def get_settings():
-    s = Settings()
-    print(f"[CONFIG] Loaded ELEVENLABS_API_KEY from .env: {s.elevenlabs_api_key[:10]}...{s.elevenlabs_api_key[-4:]}")
-    return s
+    return Settings()
 
 
 # Global settings instance for main.py and other modules
@@ -2,6 +2,8 @@
 Demo clinical cases for immediate practice without database.
 These cases have full clinical context for dynamic AI patient responses.
 """
+from types import MappingProxyType
+from typing import Optional
 
 DEMO_CASES = {
     "case-1": {
@@ -148,7 +150,12 @@ DEMO_CASES = {
 }
 
 
-def get_demo_case(case_id: str) -> dict:
+# The top-level mapping is read-only. The case fields keep their list types,
+# since callers format them into prompts and feedback text.
+DEMO_CASES = MappingProxyType(DEMO_CASES)
+
+
+def get_demo_case(case_id: str) -> Optional[dict]:
     """
     Get a demo case by ID.
 
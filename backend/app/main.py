@@ -2,24 +2,60 @@
 K2 Think FastAPI Application
 Main entry point for the clinical reasoning backend.
 """
+from contextlib import asynccontextmanager
+import logging
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from app.auth.dependencies import load_jwks
 from app.config import settings
+from app.services.supabase_service import supabase_service
+from app.utils.http_client import close_http_client
 from app.routes import sessions, reasoning, cases, consultations, case_generation, dedalus_cases
 
+logger = logging.getLogger(__name__)
+
+# CORS origins never change at runtime - resolve them once at import
+_CORS_ORIGINS = tuple(settings.cors_origins_list)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown: warm the Supabase client and load the auth signing keys."""
+    logger.info("K2 Think Backend Starting...")
+    logger.info("CORS Origins: %s", list(_CORS_ORIGINS))
+    logger.info("Featherless Model: %s", settings.featherless_model)
+
+    # Create the client up front so the first request doesn't pay for it
+    try:
+        app.state.supabase = supabase_service.client
+    except Exception as e:
+        logger.warning("Supabase client warm-up failed: %s", e)
+
+    # Fetch the Supabase signing keys once, so token checks never leave the process
+    await load_jwks()
+
+    yield
+
+    logger.info("K2 Think Backend Shutting Down...")
+    await close_http_client()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="K2 Think API",
     description="AI-powered clinical reasoning tutor for medical students",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.cors_origins_list,
+    allow_origins=_CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -87,24 +123,6 @@ async def health_check():
     }
 
 
-# Startup event
-@app.on_event("startup")
-async def startup_event():
-    """Actions to perform on application startup."""
-    print("=" * 50)
-    print("K2 Think Backend Starting...")
-    print(f"CORS Origins: {settings.cors_origins_list}")
-    print(f"Featherless Model: {settings.featherless_model}")
-    print("=" * 50)
-
-
-# Shutdown event
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Actions to perform on application shutdown."""
-    print("K2 Think Backend Shutting Down...")
-
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -23,6 +23,9 @@ class Case(CaseBase):
     """Complete case model with database fields."""
     id: UUID
     created_at: datetime
+    # Precomputed at case creation so session starts skip greeting generation/TTS
+    greeting_text: Optional[str] = None
+    greeting_audio_url: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -46,6 +46,16 @@ class ConsultationResponse(ConsultationBase):
         from_attributes = True
 
 
+class ConsultationSummary(BaseModel):
+    id: str
+    case_id: str
+    case_title: str
+    status: str
+    duration_seconds: Optional[int] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+
+
 class CaseResponse(BaseModel):
     case_id: str
     case_title: str
@@ -3,16 +3,32 @@ Routes for K2 + ChromaDB case generation.
 Generates realistic medical cases using K2 AI informed by medical knowledge base.
 """
 
-from fastapi import APIRouter, HTTPException, status
-from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, status
+from typing import Any, Dict, List, Literal, Optional, Tuple
+import asyncio
 import logging
+from uuid import UUID
 from app.services.k2_case_generator import k2_case_generator
 from app.services.chroma_service import chroma_service
 from app.services.supabase_service import supabase_service
+from app.services.reasoning_engine import reasoning_engine
+from app.models.case import Case, CaseCreate
+from app.utils.http_cache import case_list_cache, etag_response
+from app.utils.validators import parse_uuid
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Max concurrent K2 calls per generate request (keeps us under API rate limits)
+K2_MAX_CONCURRENCY = 4
+
+# Upper bound on cases per generation job, so one request can't queue unbounded K2 calls
+MAX_CASES_PER_JOB = 10
+
+# Serializes knowledge-base seeding so concurrent init calls don't seed twice
+_seed_lock = asyncio.Lock()
+_seeded = False
+
 
 @router.post("/init-knowledge-base")
 async def initialize_knowledge_base():
@@ -20,15 +36,31 @@ async def initialize_knowledge_base():
     Initialize ChromaDB with medical knowledge base.
     Only needs to run once.
     """
+    global _seeded
     try:
-        logger.info("📚 Initializing medical knowledge base...")
-        await chroma_service.seed_common_conditions()
+        async with _seed_lock:
+            if _seeded:
+                return {
+                    "success": True,
+                    "message": "Medical knowledge base already initialized"
+                }
+
+            logger.info("📚 Initializing medical knowledge base...")
+            # Only remember success, so a failed seed is retried on the next call
+            if not await chroma_service.seed_common_conditions():
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Failed to initialize knowledge base"
+                )
+            _seeded = True
 
         return {
             "success": True,
             "message": "Medical knowledge base initialized with common conditions"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error initializing knowledge base: {e}")
         raise HTTPException(
@@ -37,123 +69,216 @@ async def initialize_knowledge_base():
         )
 
 
-@router.post("/generate-with-k2")
+async def _generate_and_store(condition: str, limit: int, difficulty: str) -> Tuple[List[Dict[str, Any]], List[Case]]:
+    """
+    Generate cases with K2 and store them in Supabase.
+
+    Returns:
+        (summaries of the stored cases, the stored cases); both may be empty
+    """
+    generated_cases = []
+    stored_cases = []
+    semaphore = asyncio.Semaphore(K2_MAX_CONCURRENCY)
+
+    async def _generate(i: int):
+        async with semaphore:
+            logger.info(f"Generating case {i+1}/{limit}...")
+            return await k2_case_generator.generate_case(condition, difficulty)
+
+    # Fan out K2 generations; they're network-bound so run them concurrently
+    results = await asyncio.gather(
+        *(_generate(i) for i in range(limit)),
+        return_exceptions=True
+    )
+
+    successful = []
+    case_creates = []
+    for i, case_data in enumerate(results):
+        if isinstance(case_data, Exception):
+            logger.error(f"Case {i+1} generation raised: {case_data}")
+            continue
+        if not case_data:
+            logger.warning(f"Failed to generate case {i+1}")
+            continue
+
+        try:
+            case_creates.append(CaseCreate(
+                title=case_data.get("title", "Untitled Case"),
+                chief_complaint=case_data.get("chief_complaint", ""),
+                clinical_scenario=case_data.get("clinical_scenario", {}),
+                differential_diagnoses=case_data.get("differential_diagnoses", {}),
+                red_flags=case_data.get("red_flags", []),
+                learning_objectives=case_data.get("learning_objectives", [])
+            ))
+            successful.append(case_data)
+        except Exception as e:
+            logger.error(f"Invalid case {i+1}: {e}")
+
+    if case_creates:
+        # Store all generated cases in one round-trip
+        try:
+            stored_cases = await supabase_service.create_cases_bulk(case_creates)
+            case_list_cache.clear()
+            for case_data, stored_case in zip(successful, stored_cases):
+                generated_cases.append({
+                    "id": str(stored_case.id),  # stored in the job's JSONB result
+                    "title": case_data.get("title"),
+                    "chief_complaint": case_data.get("chief_complaint"),
+                    "source": "k2_generated",
+                    "medical_condition": condition,
+                    "difficulty": difficulty
+                })
+                logger.info(f"✅ Stored case: {case_data.get('title')}")
+        except Exception as e:
+            logger.error(f"Failed to store cases: {e}", exc_info=True)
+            stored_cases = []
+
+    return generated_cases, stored_cases
+
+
+def _job_response(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a generation_jobs row for the API."""
+    response = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "condition": job["condition"],
+        "difficulty": job["difficulty"],
+        "limit": job["requested_count"]
+    }
+    if job.get("result"):
+        response.update(job["result"])
+    if job.get("error"):
+        response["error"] = job["error"]
+    return response
+
+
+async def _set_job_status(job_id: UUID, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+    """Record a job status change, logging (not raising) failures from the background task."""
+    try:
+        await supabase_service.update_generation_job(job_id, status, result=result, error=error)
+    except Exception as e:
+        logger.warning(f"Failed to update generation job {job_id}: {e}")
+
+
+async def _run_generation_job(job_id: UUID, condition: str, limit: int, difficulty: str):
+    """Background task: run a generation job and record its outcome in generation_jobs."""
+    await _set_job_status(job_id, "running")
+    stored_cases = []
+    try:
+        generated_cases, stored_cases = await _generate_and_store(condition, limit, difficulty)
+
+        if not generated_cases:
+            await _set_job_status(job_id, "failed", error=f"Failed to generate any cases for {condition}")
+            return
+
+        logger.info(f"✅ Generated and stored {len(generated_cases)} cases")
+        await _set_job_status(job_id, "completed", result={
+            "count": len(generated_cases),
+            "cases": generated_cases,
+            "message": f"Generated {len(generated_cases)} patient case(s) for {condition}"
+        })
+
+    except Exception as e:
+        logger.error(f"Error generating cases: {e}", exc_info=True)
+        await _set_job_status(job_id, "failed", error=f"Failed to generate cases: {str(e)}")
+
+    # The job is reported done once its cases are stored; greetings are precomputed
+    # afterwards, one at a time to go easy on TTS limits (failures only log)
+    for stored_case in stored_cases:
+        await reasoning_engine.prepare_case_greeting(stored_case)
+
+
+@router.post("/generate-with-k2", status_code=status.HTTP_202_ACCEPTED)
 async def generate_cases_with_k2(
     condition: str,
-    limit: int = 1,
-    difficulty: str = "medium"
+    background_tasks: BackgroundTasks,
+    limit: int = Query(1, ge=1, le=MAX_CASES_PER_JOB),
+    difficulty: Literal["easy", "medium", "hard"] = "medium"
 ):
     """
-    Generate medical cases using K2 AI informed by medical knowledge base.
+    Queue generation of medical cases using K2 AI informed by medical knowledge base.
+    Generation runs after the response is sent; poll /jobs/{job_id} for the result.
+    Jobs are stored in Supabase, so any worker can answer the poll.
 
     Args:
         condition: Medical condition to generate case for (e.g., "Acute Chest Pain")
-        limit: Number of cases to generate
+        limit: Number of cases to generate (at most MAX_CASES_PER_JOB)
         difficulty: Case difficulty (easy, medium, hard)
 
     Returns:
-        Generated cases ready for student consultations
+        Job id and initial status
     """
-    try:
-        if difficulty not in ["easy", "medium", "hard"]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Difficulty must be: easy, medium, or hard"
-            )
+    logger.info(f"🧠 Queueing {limit} case(s) for: {condition} (difficulty: {difficulty})...")
 
-        logger.info(f"🧠 Generating {limit} case(s) for: {condition} (difficulty: {difficulty})...")
+    try:
+        job = await supabase_service.create_generation_job(condition, difficulty, limit)
+    except Exception as e:
+        logger.error(f"Error queueing generation job: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to queue case generation: {str(e)}"
+        )
 
-        generated_cases = []
+    job_id = UUID(job["id"])
+    background_tasks.add_task(_run_generation_job, job_id, condition, limit, difficulty)
 
-        # Generate cases
-        for i in range(limit):
-            logger.info(f"Generating case {i+1}/{limit}...")
+    return {"success": True, "job_id": str(job_id), "status": job["status"]}
 
-            # Use K2 to generate case
-            case_data = await k2_case_generator.generate_case(condition, difficulty)
-
-            if case_data:
-                # Store in database
-                try:
-                    # Convert dict to Pydantic model if needed
-                    from app.models.case import CaseCreate
-
-                    case_create = CaseCreate(
-                        title=case_data.get("title", "Untitled Case"),
-                        chief_complaint=case_data.get("chief_complaint", ""),
-                        clinical_scenario=case_data.get("clinical_scenario", {}),
-                        differential_diagnoses=case_data.get("differential_diagnoses", {}),
-                        red_flags=case_data.get("red_flags", []),
-                        learning_objectives=case_data.get("learning_objectives", [])
-                    )
-
-                    stored_case = await supabase_service.create_case(case_create)
-                    generated_cases.append({
-                        "id": str(stored_case.id),
-                        "title": case_data.get("title"),
-                        "chief_complaint": case_data.get("chief_complaint"),
-                        "source": "k2_generated",
-                        "medical_condition": condition,
-                        "difficulty": difficulty
-                    })
-                    logger.info(f"✅ Stored case: {case_data.get('title')}")
-                except Exception as e:
-                    logger.error(f"Failed to store case: {e}", exc_info=True)
-                    continue
-            else:
-                logger.warning(f"Failed to generate case {i+1}")
 
-        if not generated_cases:
+@router.get("/jobs/{job_id}")
+async def get_generation_job(job_id: str):
+    """
+    Get the status (and, once completed, the cases) of a generation job.
+    """
+    try:
+        job_uuid = parse_uuid(job_id)
+        job = await supabase_service.get_generation_job(job_uuid) if job_uuid else None
+        if job is None:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to generate any cases for {condition}"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job not found"
             )
-
-        logger.info(f"✅ Generated and stored {len(generated_cases)} cases")
-
-        return {
-            "success": True,
-            "count": len(generated_cases),
-            "condition": condition,
-            "difficulty": difficulty,
-            "cases": generated_cases,
-            "message": f"Generated {len(generated_cases)} patient case(s) for {condition}"
-        }
+        return _job_response(job)
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error generating cases: {e}", exc_info=True)
+        logger.error(f"Error fetching generation job: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to generate cases: {str(e)}"
+            detail=f"Failed to fetch generation job: {str(e)}"
         )
 
 
 @router.get("/available")
-async def get_available_cases():
+async def get_available_cases(request: Request):
     """
     Get list of available cases for consultation.
     Student will pick one and select difficulty level.
+    Responses are cached briefly and carry an ETag for conditional GETs.
     """
-    try:
-        cases = await supabase_service.list_cases(limit=50)
-
+    async def _load():
+        cases = await supabase_service.list_case_summaries(limit=50)
         return {
             "success": True,
             "count": len(cases),
             "cases": [
                 {
-                    "id": str(case.id),
+                    "id": case.id,
                     "title": case.title,
                     "chief_complaint": case.chief_complaint,
                     "learning_objectives": case.learning_objectives,
-                    "source": case.metadata.get("source", "manual") if hasattr(case, 'metadata') else "manual"
+                    # cases has no metadata column, so every stored case is manual
+                    "source": "manual"
                 }
                 for case in cases
             ]
         }
 
+    try:
+        cached = await case_list_cache.get_or_set(("available",), _load)
+        return etag_response(request, cached)
+
     except Exception as e:
         logger.error(f"Error fetching cases: {e}")
         raise HTTPException(
@@ -1,40 +1,46 @@
 """
 Clinical case management routes.
 """
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, status
 from uuid import UUID
 from typing import List
 from app.models.case import Case, CaseCreate, CasePublic
 from app.services.supabase_service import supabase_service
+from app.services.reasoning_engine import reasoning_engine
+from app.utils.http_cache import case_list_cache, etag_response
 
 router = APIRouter()
 
 
 @router.get("", response_model=List[CasePublic])
-async def list_cases(limit: int = 50):
+async def list_cases(request: Request, limit: int = Query(50, ge=1, le=100)):
     """
     List all available clinical cases.
     Returns public info only (no spoilers).
+    Responses are cached briefly and carry an ETag for conditional GETs.
     
     Args:
-        limit: Maximum number of cases to return (default 50)
+        limit: Maximum number of cases to return (default 50, at most 100)
         
     Returns:
         List of case summaries
     """
-    try:
-        cases = await supabase_service.list_cases(limit=limit)
-        
-        # Convert to public format (hide answers)
+    async def _load():
+        # Only the public columns are fetched (hides answers)
+        cases = await supabase_service.list_case_summaries(limit=limit)
         return [
-            CasePublic(
-                id=case.id,
-                title=case.title,
-                chief_complaint=case.chief_complaint,
-                learning_objectives=case.learning_objectives
-            )
+            {
+                "id": case.id,
+                "title": case.title,
+                "chief_complaint": case.chief_complaint,
+                "learning_objectives": case.learning_objectives
+            }
             for case in cases
         ]
+
+    try:
+        cached = await case_list_cache.get_or_set(("cases", limit), _load)
+        return etag_response(request, cached)
         
     except Exception as e:
         print(f"Error listing cases: {str(e)}")
@@ -65,7 +71,8 @@ async def get_case(case_id: UUID):
                 detail="Case not found"
             )
         
-        return CasePublic(
+        # case is already a validated Case, so skip re-validation
+        return CasePublic.model_construct(
             id=case.id,
             title=case.title,
             chief_complaint=case.chief_complaint,
@@ -83,7 +90,7 @@ async def get_case(case_id: UUID):
 
 
 @router.post("", response_model=Case, status_code=status.HTTP_201_CREATED)
-async def create_case(case_data: CaseCreate):
+async def create_case(case_data: CaseCreate, background_tasks: BackgroundTasks):
     """
     Create a new clinical case.
     
@@ -98,6 +105,8 @@ async def create_case(case_data: CaseCreate):
     """
     try:
         case = await supabase_service.create_case(case_data)
+        case_list_cache.clear()
+        background_tasks.add_task(reasoning_engine.prepare_case_greeting, case)
         return case
         
     except Exception as e:
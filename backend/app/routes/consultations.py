@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from app.auth.dependencies import get_current_user
+from fastapi import APIRouter, HTTPException, status, UploadFile, File, Response, Query
+from app.auth.deps import CurrentUser
 from app.database import get_supabase
 from app.models.consultation import (
     ConsultationCreate,
     ConsultationResponse,
+    ConsultationSummary,
     CaseResponse,
 )
 from app.services.elevenlabs_service import elevenlabs_service
-import uuid
-from datetime import datetime
+from app.services.supabase_service import supabase_service
+import asyncio
 import logging
+import orjson
+from typing import Literal, Optional
+from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -50,17 +54,23 @@ STANDARDIZED_CASES = [
 ]
 
 
+# Cases are static, so validate and serialize them once at import
+_STANDARDIZED_CASES_JSON = orjson.dumps(
+    [CaseResponse(**case).model_dump() for case in STANDARDIZED_CASES]
+)
+
+
 @router.get("/cases", response_model=list[CaseResponse])
 async def get_cases():
     """Get list of available standardized cases"""
-    return STANDARDIZED_CASES
+    return Response(content=_STANDARDIZED_CASES_JSON, media_type="application/json")
 
 
 @router.post("/start-simple")
 async def start_consultation_simple(
     case_id: str,
-    difficulty: str = "medium",
-    user=Depends(get_current_user)
+    user: CurrentUser,
+    difficulty: Literal["easy", "medium", "hard"] = "medium",
 ):
     """
     Simplified consultation start - user only selects case and difficulty.
@@ -72,8 +82,6 @@ async def start_consultation_simple(
         user: Current authenticated user
     """
     try:
-        from app.services.supabase_service import supabase_service
-
         # Fetch the case
         case = await supabase_service.get_case(case_id)
         if not case:
@@ -82,14 +90,9 @@ async def start_consultation_simple(
                 detail=f"Case {case_id} not found"
             )
 
-        # Create consultation
-        consultation_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
-
-        # Store with case data + difficulty
-        result = get_supabase().table("consultations").insert(
+        # Store with case data + difficulty (id is generated by Postgres)
+        query = get_supabase().table("consultations").insert(
             {
-                "id": consultation_id,
                 "user_id": user.id,
                 "case_id": str(case.id),
                 "case_title": case.title,
@@ -102,15 +105,15 @@ async def start_consultation_simple(
                     "learning_objectives": case.learning_objectives,
                 },
                 "status": "in_progress",
-                "created_at": now,
             }
-        ).execute()
+        )
+        result = await asyncio.to_thread(query.execute)
 
         if result.data:
             return {
                 "success": True,
-                "consultation_id": consultation_id,
-                "case_id": str(case.id),
+                "consultation_id": result.data[0]["id"],
+                "case_id": case.id,
                 "case_title": case.title,
                 "chief_complaint": case.chief_complaint,
                 "difficulty": difficulty,
@@ -125,7 +128,7 @@ async def start_consultation_simple(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error starting consultation: {e}")
+        logger.error("Error starting consultation: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error starting consultation: {str(e)}",
@@ -134,41 +137,29 @@ async def start_consultation_simple(
 
 @router.post("/start", response_model=ConsultationResponse)
 async def start_consultation(
-    consultation: ConsultationCreate, user=Depends(get_current_user)
+    consultation: ConsultationCreate, user: CurrentUser
 ):
     """Start a new consultation session"""
-    print(f"\n=== START CONSULTATION ENDPOINT CALLED ===")
     try:
-        print(f"DEBUG: User authenticated: {user}")
-        print(f"DEBUG: User ID: {user.id if user else 'None'}")
-        print(f"DEBUG: Case ID: {consultation.case_id}")
-        print(f"DEBUG: Case Title: {consultation.case_title}")
-
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not authenticated",
             )
 
-        # Create consultation record in database
-        consultation_id = str(uuid.uuid4())
-        now = datetime.utcnow().isoformat()
-
-        print(f"DEBUG: Attempting to insert into database with user_id={user.id}")
-        result = get_supabase().table("consultations").insert(
+        # Create consultation record in database (id is generated by Postgres)
+        query = get_supabase().table("consultations").insert(
             {
-                "id": consultation_id,
                 "user_id": user.id,
                 "case_id": consultation.case_id,
                 "case_title": consultation.case_title,
                 "status": "in_progress",
-                "created_at": now,
             }
-        ).execute()
+        )
+        result = await asyncio.to_thread(query.execute)
 
-        print(f"DEBUG: Insert result: {result}")
         if result.data:
-            print(f"DEBUG: Consultation created successfully: {result.data[0]}")
+            logger.debug("Consultation created user_id=%s case_id=%s", user.id, consultation.case_id)
             return result.data[0]
         else:
             raise HTTPException(
@@ -178,9 +169,7 @@ async def start_consultation(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERROR: {type(e).__name__}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.error("Error starting consultation: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error starting consultation: {str(e)}",
@@ -189,26 +178,24 @@ async def start_consultation(
 
 @router.post("/{consultation_id}/audio")
 async def upload_audio(
-    consultation_id: str, file: UploadFile = File(...), user=Depends(get_current_user)
+    consultation_id: str, user: CurrentUser, file: UploadFile = File(...)
 ):
     """Upload audio and get transcription"""
-    print(f"\n=== UPLOAD AUDIO ENDPOINT CALLED ===")
-    print(f"Consultation ID: {consultation_id}")
-    print(f"User ID: {user.id}")
-    print(f"File: {file.filename}, Content-Type: {file.content_type}")
+    logger.debug(
+        "Audio upload consultation_id=%s user_id=%s file=%s content_type=%s size=%s",
+        consultation_id, user.id, file.filename, file.content_type, file.size,
+    )
 
     try:
-        # Read audio file
-        audio_data = await file.read()
-        print(f"DEBUG: Received audio file, size: {len(audio_data)} bytes")
 
-        # Transcribe using OpenAI Whisper
-        transcription_result = await elevenlabs_service.transcribe_audio(audio_data)
-        print(f"DEBUG: Transcription result: {transcription_result}")
+        # Hand the spooled upload file straight to the transcriber so it is
+        # streamed in chunks rather than copied into one bytes object
+        await file.seek(0)
+        transcription_result = await elevenlabs_service.transcribe_audio(file.file)
 
         if not transcription_result.get("success"):
             error_msg = transcription_result.get("error", "Unknown error")
-            print(f"ERROR: Transcription failed: {error_msg}")
+            logger.warning("Transcription failed: %s", error_msg)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Failed to transcribe audio: {error_msg}",
@@ -217,21 +204,17 @@ async def upload_audio(
         transcript = transcription_result.get("transcript", "")
         duration = transcription_result.get("duration_seconds", 0)
 
-        # Print transcript to terminal
-        print("\n" + "="*80)
-        print(f"TRANSCRIPTION RESULT:")
-        print(f"Duration: {duration} seconds")
-        print(f"Transcript: {transcript}")
-        print("="*80 + "\n")
+        logger.debug("Transcribed %s seconds of audio (%d chars)", duration, len(transcript))
 
         # Update consultation with transcript
-        update_result = get_supabase().table("consultations").update(
+        query = get_supabase().table("consultations").update(
             {
                 "transcript": transcript,
                 "duration_seconds": duration,
                 "status": "transcribed",
             }
-        ).eq("id", consultation_id).eq("user_id", user.id).execute()
+        ).eq("id", consultation_id).eq("user_id", user.id)
+        update_result = await asyncio.to_thread(query.execute)
 
         if update_result.data:
             return {
@@ -256,12 +239,13 @@ async def upload_audio(
 
 
 @router.get("/{consultation_id}", response_model=ConsultationResponse)
-async def get_consultation(consultation_id: str, user=Depends(get_current_user)):
+async def get_consultation(consultation_id: str, user: CurrentUser):
     """Get consultation details"""
     try:
-        result = get_supabase().table("consultations").select("*").eq(
+        query = get_supabase().table("consultations").select("*").eq(
             "id", consultation_id
-        ).eq("user_id", user.id).execute()
+        ).eq("user_id", user.id)
+        result = await asyncio.to_thread(query.execute)
 
         if result.data and len(result.data) > 0:
             return result.data[0]
@@ -279,13 +263,32 @@ async def get_consultation(consultation_id: str, user=Depends(get_current_user))
         )
 
 
-@router.get("/", response_model=list[ConsultationResponse])
-async def list_consultations(user=Depends(get_current_user)):
-    """List all consultations for current user"""
+# Columns needed for the history list (skips transcript/feedback/case_data)
+_CONSULTATION_SUMMARY_COLUMNS = "id,case_id,case_title,status,duration_seconds,created_at,completed_at"
+
+
+@router.get("/", response_model=list[ConsultationSummary])
+async def list_consultations(
+    user: CurrentUser,
+    limit: int = Query(100, ge=1, le=100),
+    before: Optional[datetime] = None,
+):
+    """
+    List consultations for current user, newest first.
+
+    Args:
+        limit: Maximum number of consultations to return
+        before: Only return consultations created before this timestamp
+            (pass the last item's created_at to fetch the next page)
+    """
     try:
-        result = get_supabase().table("consultations").select("*").eq(
-            "user_id", user.id
-        ).order("created_at", desc=True).execute()
+        query = get_supabase().table("consultations").select(
+            _CONSULTATION_SUMMARY_COLUMNS
+        ).eq("user_id", user.id)
+        if before is not None:
+            query = query.lt("created_at", before.isoformat())
+        query = query.order("created_at", desc=True).limit(limit)
+        result = await asyncio.to_thread(query.execute)
 
         return result.data or []
     except Exception as e:
@@ -3,20 +3,27 @@ Dedalus-powered case generation routes.
 Generates realistic clinical cases from medical literature.
 """
 
-from fastapi import APIRouter, HTTPException, status
-from pydantic import BaseModel
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status
+from pydantic import BaseModel, Field
 from typing import Optional
 from app.services.dedalus_agent import get_dedalus_agent
 from app.services.supabase_service import supabase_service
+from app.services.reasoning_engine import reasoning_engine
+from app.utils.http_cache import case_list_cache
 
 router = APIRouter(prefix="/api/dedalus", tags=["dedalus"])
 
 
 class CaseGenerationRequest(BaseModel):
-    medical_condition: str
+    medical_condition: str = Field(..., min_length=1)
     difficulty: Optional[str] = "medium"
 
 
+class LiteratureSearchRequest(BaseModel):
+    query: str = Field(..., min_length=1)
+    max_results: int = Field(5, ge=1, le=50)
+
+
 class CaseGenerationResponse(BaseModel):
     case: dict
     source: str = "dedalus"
@@ -24,7 +31,7 @@ class CaseGenerationResponse(BaseModel):
 
 
 @router.post("/generate-case", response_model=dict)
-async def generate_case_from_literature(request: CaseGenerationRequest):
+async def generate_case_from_literature(request: CaseGenerationRequest, background_tasks: BackgroundTasks):
     """
     Generate a realistic patient case from medical literature using Dedalus.
     
@@ -35,12 +42,6 @@ async def generate_case_from_literature(request: CaseGenerationRequest):
         Generated case with real literature findings
     """
     try:
-        if not request.medical_condition:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="medical_condition is required"
-            )
-        
         # Generate case using Dedalus agent
         agent = get_dedalus_agent()
         case = await agent.generate_case_from_literature(
@@ -66,6 +67,8 @@ async def generate_case_from_literature(request: CaseGenerationRequest):
             )
             saved_case = await supabase_service.create_case(case_to_save)
             case["id"] = saved_case.id  # Use the database ID
+            case_list_cache.clear()
+            background_tasks.add_task(reasoning_engine.prepare_case_greeting, saved_case)
         except Exception as e:
             print(f"Warning: Could not save case to database: {str(e)}")
             # Continue anyway - case can still be used in memory
@@ -88,29 +91,22 @@ async def generate_case_from_literature(request: CaseGenerationRequest):
 
 
 @router.post("/search-literature")
-async def search_medical_literature(query: str, max_results: int = 5):
+async def search_medical_literature(request: LiteratureSearchRequest):
     """
     Search medical literature (PubMed) for a query.
     
     Args:
-        query: Search query
-        max_results: Maximum results to return
+        request: Contains the search query and max_results
         
     Returns:
         List of literature search results
     """
     try:
-        if not query:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="query is required"
-            )
-        
         agent = get_dedalus_agent()
-        results = await agent.search_pubmed(query, max_results)
+        results = await agent.search_pubmed(request.query, request.max_results)
         
         return {
-            "query": query,
+            "query": request.query,
             "results": results,
             "count": len(results),
             "source": "pubmed"
@@ -1,28 +1,148 @@
 """
 Clinical reasoning interaction routes.
 """
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, status
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
 from fastapi.responses import StreamingResponse
+from dataclasses import dataclass
 from uuid import UUID
 from typing import Optional
+import asyncio
+import logging
+import pybase64
+import re
+import time
 import uuid
-from app.models.interaction import InteractionResponse
+from app.config import get_settings
+from app.models.interaction import Interaction, InteractionResponse
+from app.models.session import Session
 from app.services.elevenlabs_service import elevenlabs_service
 from app.services.supabase_service import supabase_service
 from app.services.reasoning_engine import reasoning_engine
-from app.utils.validators import validate_audio_file, validate_text_input
+from app.utils.text import strip_think
+from app.utils.validators import parse_uuid, validate_audio_file, validate_text_input
 
+logger = logging.getLogger(__name__)
+settings = get_settings()
 router = APIRouter()
 
+# Patient voice used for tutor audio
+_VOICE_ID = settings.elevenlabs_voice_id
 
-def _is_demo_session(session_id: str) -> bool:
-    """Check if this is a demo session (dummy UUID for testing)."""
-    return session_id == "00000000-0000-0000-0000-000000000000"
+# K2 response cleanup patterns, compiled once
+_XML_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+
+# Strong references to fire-and-forget tasks so they aren't garbage collected mid-flight
+_background_tasks = set()
+
+
+def _spawn(coro):
+    """Schedule a coroutine without awaiting it, keeping a reference until it finishes."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def _upload_student_audio(audio_file: UploadFile, session_uuid: UUID) -> Optional[str]:
+    """Upload the student's audio to storage; returns the URL, or None on failure."""
+    try:
+        # Storage needs bytes; read them only here, after transcription has
+        # streamed the spooled file, so the upload is the only in-memory copy
+        await audio_file.seek(0)
+        audio_data = await audio_file.read()
+        audio_url = await supabase_service.upload_audio(
+            file_data=audio_data,
+            session_id=session_uuid,
+            filename=f"student_{uuid.uuid4().hex}.mp3",
+            content_type=audio_file.content_type or "audio/mpeg"
+        )
+        logger.debug("Audio uploaded: %s", audio_url)
+        return audio_url
+    except Exception as e:
+        logger.warning("Failed to upload audio: %s", e)
+        return None
+
+
+async def _attach_streamed_audio(save_task: asyncio.Task, response_audio: bytes, session_id: UUID):
+    """Upload audio tee'd from a TTS stream and link it to the interaction once it's saved."""
+    interaction = await save_task
+    if interaction is None or not response_audio:
+        return
+    try:
+        response_audio_url = await supabase_service.upload_audio(
+            file_data=response_audio,
+            session_id=session_id,
+            filename=f"tutor_{uuid.uuid4().hex}.mp3",
+            content_type="audio/mpeg"
+        )
+        if response_audio_url:
+            await supabase_service.update_interaction_audio(interaction.id, response_audio_url)
+    except Exception as e:
+        logger.warning("Failed to store streamed tutor audio: %s", e)
+
+
+async def _safe_save_interaction(**kwargs) -> Optional[Interaction]:
+    """Save an interaction, logging (not raising) failures; returns None if the save failed."""
+    try:
+        return await supabase_service.save_interaction(**kwargs)
+    except Exception as e:
+        logger.warning("Failed to save interaction: %s", e)
+        return None
+
+
+def _clean_response(text: str) -> str:
+    """Strip K2 <think> blocks and other XML-like tags, and collapse whitespace."""
+    # Most responses carry no tags at all; skip tag stripping for those
+    if '<' in text:
+        # An unclosed <think> survives strip_think; its tag is dropped by _XML_RE
+        text = strip_think(text)
+        text = _XML_RE.sub('', text)
+    return _WS_RE.sub(' ', text).strip()
+
+
+def _is_demo_session(session_uuid: UUID) -> bool:
+    """Check if this is a demo session (the all-zero dummy UUID used for testing)."""
+    return session_uuid.int == 0
+
+
+@dataclass
+class SessionContext:
+    """Parsed session ID plus its database record (None for demo sessions)."""
+    session_uuid: UUID
+    is_demo: bool
+    session: Optional[Session]
+
+
+async def resolve_session(session_id: str = Form(...)) -> SessionContext:
+    """
+    Parse the session_id form field and load its session.
+
+    Raises 400 for a malformed ID and 404 if a non-demo session doesn't exist.
+    """
+    session_uuid = parse_uuid(session_id)
+    if session_uuid is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid session ID format"
+        )
+
+    # Demo sessions are in-memory and have no database record
+    if _is_demo_session(session_uuid):
+        return SessionContext(session_uuid=session_uuid, is_demo=True, session=None)
+
+    session = await supabase_service.get_session(session_uuid)
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found"
+        )
+    return SessionContext(session_uuid=session_uuid, is_demo=False, session=session)
 
 
 @router.post("/interact", response_model=InteractionResponse)
 async def interact(
-    session_id: str = Form(...),
+    ctx: SessionContext = Depends(resolve_session),
     audio_file: Optional[UploadFile] = File(None),
     text_input: Optional[str] = Form(None),
     case_id: Optional[str] = Form(None)  # For demo sessions
@@ -34,151 +154,84 @@ async def interact(
     Supports both voice and text input.
     
     Args:
-        session_id: Session UUID (form field)
+        ctx: Session resolved from the session_id form field
         audio_file: Optional audio file upload
         text_input: Optional text input (if no audio)
         
     Returns:
         InteractionResponse with tutor's Socratic response
     """
-    import time
     start_time = time.time()
-
-    print("\n" + "="*80)
-    print("🎙️  AUDIO INTERACTION REQUEST RECEIVED")
-    print(f"Session ID: {session_id}")
-    print(f"Case ID: {case_id} (type: {type(case_id).__name__})")  # DEBUG
-    print(f"Has audio file: {audio_file is not None}")
-    print(f"Has text input: {text_input is not None}")
-    print("="*80)
+    session_uuid = ctx.session_uuid
+    is_demo = ctx.is_demo
+    logger.debug(
+        "Interaction request session_id=%s case_id=%s audio=%s text=%s",
+        session_uuid, case_id, audio_file is not None, text_input is not None,
+    )
     
     try:
-        # Validate session ID
-        print("📋 Step 1: Validating session ID...")
-
-        # Parse session ID as UUID
-        try:
-            session_uuid = UUID(session_id)
-            print(f"   ✓ Valid UUID: {session_uuid}")
-        except ValueError:
-            print(f"   ✗ Invalid session ID format: {session_id}")
+        # Check session is active
+        if not is_demo and ctx.session.status != "active":
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid session ID format"
+                detail=f"Session is {ctx.session.status}, not active"
             )
-
-        # Check if this is a demo session (in-memory, no database)
-        is_demo = _is_demo_session(session_id)
-
-        if is_demo:
-            print(f"   ✓ Demo session detected - skipping database lookup")
-            session = None  # Demo sessions don't have a database record
-        else:
-            # Check if session exists in database
-            print("🔍 Step 2: Checking if session exists...")
-            session = await supabase_service.get_session(session_uuid)
-            if not session:
-                print(f"   ✗ Session not found: {session_uuid}")
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Session not found"
-                )
-            print(f"   ✓ Session found: {session.case_id}")
-
-            # Check session is active
-            print(f"📊 Step 3: Checking session status...")
-            if session.status != "active":
-                print(f"   ✗ Session is {session.status}, not active")
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Session is {session.status}, not active"
-                )
-
-        print(f"   ✓ Session is active")
         
         # Get student input (transcribe audio or use text)
         student_input_text = ""
         audio_url = None
+        upload_task = None
         
         if audio_file:
-            print(f"🎵 Step 4: Processing audio file...")
-            print(f"   File name: {audio_file.filename}")
-            print(f"   Content type: {audio_file.content_type}")
-            
             # Validate audio file
             validate_audio_file(audio_file)
-            print(f"   ✓ Audio file validated")
             
-            # Read audio data
-            audio_data = await audio_file.read()
-            print(f"   ✓ Audio data read: {len(audio_data)} bytes")
+            logger.debug("Audio received: %s (%s), %s bytes", audio_file.filename, audio_file.content_type, audio_file.size)
             
-            # Transcribe audio using AssemblyAI
-            print("🎤 Step 5: Transcribing audio with AssemblyAI...")
+            # Transcribe audio using AssemblyAI, streaming from the spooled upload
             try:
-                transcription_result = await elevenlabs_service.transcribe_audio(audio_data)
+                await audio_file.seek(0)
+                transcription_result = await elevenlabs_service.transcribe_audio(audio_file.file)
                 if not transcription_result.get("success"):
                     error_msg = transcription_result.get("error", "Unknown transcription error")
-                    print(f"   ✗ Transcription failed: {error_msg}")
+                    logger.warning("Transcription failed: %s", error_msg)
                     raise HTTPException(
                         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                         detail=f"Failed to transcribe audio: {error_msg}"
                     )
                 student_input_text = transcription_result.get("transcript", "")
                 if not student_input_text or student_input_text.strip() == "":
-                    print(f"   ✗ Transcription resulted in empty text")
-                    print(f"   Possible causes:")
-                    print(f"      1. Audio recording was too short (try 2-3 seconds minimum)")
-                    print(f"      2. No speech detected (check microphone)")
-                    print(f"      3. Audio volume too low (speak louder/closer to mic)")
-                    print(f"      4. Background noise only")
+                    # Usually a too-short recording, no speech, low volume or background noise only
+                    logger.info("Transcription returned empty text")
                     raise HTTPException(
                         status_code=status.HTTP_400_BAD_REQUEST,
                         detail="No speech detected in audio. Please try recording again and speak clearly for at least 2-3 seconds."
                     )
-                print(f"   ✓ Transcription successful")
-                print(f"   📝 Transcript: {student_input_text[:100]}..." if len(student_input_text) > 100 else f"   📝 Transcript: {student_input_text}")
-                elapsed = time.time() - start_time
-                print(f"   ⏱️  Time elapsed: {elapsed:.2f}s")
+                logger.debug("Transcribed %d chars in %.2fs", len(student_input_text), time.time() - start_time)
             except HTTPException:
                 raise
             except Exception as e:
-                print(f"   ✗ Transcription error: {str(e)}")
+                logger.error("Transcription error: %s", e)
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail=f"Failed to transcribe audio: {str(e)}"
                 )
             
-            # Upload audio to storage (non-blocking, don't fail if this fails)
-            print("💾 Step 6: Uploading student audio to storage...")
-            try:
-                audio_filename = f"student_{uuid.uuid4()}.mp3"
-                audio_url = await supabase_service.upload_audio(
-                    file_data=audio_data,
-                    session_id=session_uuid,
-                    filename=audio_filename,
-                    content_type=audio_file.content_type or "audio/mpeg"
-                )
-                print(f"   ✓ Audio uploaded: {audio_url}")
-            except Exception as e:
-                print(f"   ⚠️  Warning: Failed to upload audio: {str(e)}")
+            # Upload audio to storage concurrently with K2 reasoning (don't fail if this fails)
+            upload_task = _spawn(_upload_student_audio(audio_file, session_uuid))
         
         elif text_input:
-            print(f"✍️  Step 4: Using text input...")
             # Use text input
             validate_text_input(text_input)
             student_input_text = text_input
-            print(f"   ✓ Text input: {student_input_text[:100]}..." if len(student_input_text) > 100 else f"   ✓ Text input: {student_input_text}")
         
         else:
-            print("   ✗ No input provided")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Either audio_file or text_input must be provided"
             )
         
         # Generate tutor response using reasoning engine
-        print("🤖 Step 7: Generating tutor response with K2...")
         try:
             response_data = await reasoning_engine.generate_response(
                 session_id=session_uuid,
@@ -188,117 +241,65 @@ async def interact(
             
             tutor_response = response_data["tutor_response"]
             reasoning_metadata = response_data["reasoning_metadata"]
-            print(f"   ✓ K2 response generated")
-            print(f"   📝 Full Response Text: '{tutor_response}'")
-            print(f"   📊 Response length: {len(tutor_response)} chars")
-            elapsed = time.time() - start_time
-            print(f"   ⏱️  Time elapsed: {elapsed:.2f}s")
+            logger.debug("K2 response: %d chars after %.2fs", len(tutor_response), time.time() - start_time)
             
         except Exception as e:
-            print(f"   ✗ K2 reasoning error: {str(e)}")
+            logger.error("K2 reasoning error: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to generate response: {str(e)}"
             )
+
+        # Student audio upload ran alongside reasoning; collect its URL
+        if upload_task is not None:
+            audio_url = await upload_task
+
+        # Clean once (remove XML tags like <think>); used for both TTS and display
+        display_response = _clean_response(tutor_response)
         
         # Generate speech for response (using ElevenLabs TTS)
-        print("🔊 Step 8: Generating TTS audio with ElevenLabs...")
         response_audio_url = None
         try:
-            from app.config import get_settings
-            import re
-            settings = get_settings()
-            
-            # Clean the response text for TTS
-            # Remove XML tags like <think>...</think> that K2 includes
-            clean_text = tutor_response
-            print(f"   INPUT to TTS cleaning: '{clean_text}'")
-            print(f"   Original text length: {len(clean_text)} chars")
-
-            # Remove <think> blocks (K2 reasoning tags)
-            clean_text = re.sub(r'<think>.*?</think>', '', clean_text, flags=re.DOTALL)
-            print(f"   After removing <think>: '{clean_text}'")
-
-            # Remove any other XML-like tags
-            clean_text = re.sub(r'<[^>]+>', '', clean_text)
-            print(f"   After removing XML: '{clean_text}'")
-
-            # Trim whitespace and normalize
-            clean_text = clean_text.strip()
-
-            # Replace multiple spaces/newlines with single space
-            clean_text = re.sub(r'\s+', ' ', clean_text)
-
-            print(f"   FINAL TEXT for TTS: '{clean_text}'")
-            print(f"   Cleaned text length: {len(clean_text)} chars")
+            clean_text = display_response
             
             if not clean_text:
-                print(f"   ⚠️  Warning: Cleaned text is empty, skipping TTS")
                 raise ValueError("Cleaned text is empty after removing XML tags")
             
             # Validate text length (ElevenLabs limit is ~5000 chars)
             if len(clean_text) > 5000:
-                print(f"   ⚠️  Warning: Text too long ({len(clean_text)} chars), truncating to 5000")
-                clean_text = clean_text[:4997] + "..."
+                logger.info("TTS text too long (%d chars), truncating to 5000", len(clean_text))
+                clean_text = clean_text[:5000]
             
             response_audio_bytes = await elevenlabs_service.generate_voice(
                 text=clean_text,
-                voice_id=settings.elevenlabs_voice_id
+                voice_id=_VOICE_ID
             )
             
             if response_audio_bytes:
-                print(f"   ✓ TTS audio generated: {len(response_audio_bytes)} bytes")
-                # Return audio as base64 data URL (no Supabase upload needed)
-                import base64
-                audio_base64 = base64.b64encode(response_audio_bytes).decode('utf-8')
-                response_audio_url = f"data:audio/mpeg;base64,{audio_base64}"
-                print(f"   ✓ Audio encoded as data URL")
+                # Return audio as base64 data URL (no Supabase upload needed);
+                # encode in a worker thread so large clips don't stall the event loop
+                audio_base64 = await asyncio.to_thread(pybase64.b64encode, response_audio_bytes)
+                response_audio_url = f"data:audio/mpeg;base64,{audio_base64.decode('ascii')}"
             # TTS optional - text response is still returned
         except Exception as e:
             # TTS optional - text response is still returned
-            print(f"   ❌ TTS/Upload failed: {type(e).__name__}: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.warning("TTS failed: %s: %s", type(e).__name__, e, exc_info=True)
             response_audio_url = None
         
-        # Save interaction to database (skip for demo sessions)
-        print("💾 Step 10: Saving interaction to database...")
-        if is_demo:
-            print(f"   ℹ️  Demo session - skipping database save")
-        else:
-            try:
-                await supabase_service.save_interaction(
-                    session_id=session_uuid,
-                    student_input=student_input_text,
-                    tutor_response=tutor_response,
-                    audio_url=audio_url,
-                    response_audio_url=response_audio_url,
-                    reasoning_metadata=reasoning_metadata
-                )
-                print(f"   ✓ Interaction saved")
-            except Exception as e:
-                print(f"   ⚠️  Warning: Failed to save interaction: {str(e)}")
-                # Continue even if save fails
-        
-        # Clean response for frontend display (remove XML tags like <think>)
-        print("🧹 Step 11: Cleaning response for display...")
-        display_response = tutor_response
-        # Remove <think> tags and content (K2 reasoning blocks)
-        display_response = re.sub(r'<think>.*?</think>', '', display_response, flags=re.DOTALL)
-        # Remove any other XML-like tags
-        display_response = re.sub(r'<[^>]+>', '', display_response)
-        # Normalize whitespace
-        display_response = re.sub(r'\s+', ' ', display_response).strip()
-        
-        print(f"   Original length: {len(tutor_response)} chars")
-        print(f"   Cleaned length: {len(display_response)} chars")
-        print(f"   Display response preview: {display_response[:150]}..." if len(display_response) > 150 else f"   Display response: {display_response}")
+        # Save interaction to database in the background (skip for demo sessions);
+        # the client doesn't need the saved row, and concurrent saves for a session
+        # get distinct interaction numbers (see supabase_service.save_interaction)
+        if not is_demo:
+            _spawn(_safe_save_interaction(
+                session_id=session_uuid,
+                student_input=student_input_text,
+                tutor_response=tutor_response,
+                audio_url=audio_url,
+                response_audio_url=response_audio_url,
+                reasoning_metadata=reasoning_metadata
+            ))
         
-        # Return response
-        elapsed_total = time.time() - start_time
-        print(f"⏱️  TOTAL TIME: {elapsed_total:.2f}s")
-        print("✅ Step 12: Returning response to client")
-        print("="*80 + "\n")
+        logger.info("Interaction handled in %.2fs", time.time() - start_time)
         return InteractionResponse(
             student_input=student_input_text,
             tutor_response=display_response,  # Send cleaned response to frontend
@@ -309,13 +310,7 @@ async def interact(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"\n❌ FATAL ERROR in interact endpoint:")
-        print(f"   Error type: {type(e).__name__}")
-        print(f"   Error message: {str(e)}")
-        import traceback
-        print(f"   Traceback:")
-        traceback.print_exc()
-        print("="*80 + "\n")
+        logger.error("Error in interact endpoint: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to process interaction: {str(e)}"
@@ -324,7 +319,7 @@ async def interact(
 
 @router.post("/interact-stream")
 async def interact_stream(
-    session_id: str = Form(...),
+    ctx: SessionContext = Depends(resolve_session),
     audio_file: Optional[UploadFile] = File(None),
     text_input: Optional[str] = Form(None),
     case_id: Optional[str] = Form(None)  # For demo sessions
@@ -334,148 +329,122 @@ async def interact_stream(
     Provides lower latency by streaming TTS audio while response is generated.
 
     Args:
-        session_id: Session UUID (form field)
+        ctx: Session resolved from the session_id form field
         audio_file: Optional audio file upload
         text_input: Optional text input (if no audio)
 
     Returns:
         StreamingResponse with audio/mpeg content
     """
-    print("\n" + "="*80)
-    print("🎙️  STREAMING AUDIO INTERACTION REQUEST RECEIVED")
-    print(f"Session ID: {session_id}")
-    print("="*80)
+    session_uuid = ctx.session_uuid
+    is_demo = ctx.is_demo
+    logger.debug("Streaming interaction request session_id=%s case_id=%s", session_uuid, case_id)
 
     # READ AND TRANSCRIBE AUDIO BEFORE STREAMING (CRITICAL!)
     # This must happen in the outer function, not in the generator
-    audio_data = None
     student_input_text = ""
-    session_uuid = None
 
     try:
-        # Validate session ID
-        try:
-            session_uuid = UUID(session_id)
-            print(f"📋 Validating session ID: {session_uuid}")
-        except ValueError:
-            print(f"   ✗ Invalid session ID format: {session_id}")
-            raise HTTPException(status_code=400, detail="Invalid session ID format")
-
-        # Check if this is a demo session (in-memory, no database)
-        is_demo = _is_demo_session(session_id)
-
-        if is_demo:
-            print(f"✓ Demo session detected - skipping database lookup")
-        else:
-            # Check if session exists in database
-            session = await supabase_service.get_session(session_uuid)
-            if not session:
-                print(f"   ✗ Session not found: {session_uuid}")
-                raise HTTPException(status_code=404, detail="Session not found")
-
-            print(f"✓ Session found: {session.case_id}")
-
         # Get student input - READ FILE HERE, BEFORE STREAMING
         if audio_file:
-            print(f"🎵 Processing audio file...")
             validate_audio_file(audio_file)
-            audio_data = await audio_file.read()
-            print(f"   ✓ Audio data read: {len(audio_data)} bytes")
 
-            # Transcribe audio
-            print("🎤 Transcribing audio...")
-            transcription_result = await elevenlabs_service.transcribe_audio(audio_data)
+            # Transcribe audio, streaming from the spooled upload
+            await audio_file.seek(0)
+            transcription_result = await elevenlabs_service.transcribe_audio(audio_file.file)
             if not transcription_result.get("success"):
                 error_msg = transcription_result.get('error', 'Unknown error')
-                print(f"   ✗ Transcription failed: {error_msg}")
+                logger.warning("Transcription failed: %s", error_msg)
                 raise HTTPException(status_code=500, detail=f"Transcription failed: {error_msg}")
 
             student_input_text = transcription_result.get("transcript", "")
             if not student_input_text or student_input_text.strip() == "":
-                print(f"   ✗ No speech detected in audio")
                 raise HTTPException(status_code=400, detail="No speech detected in audio. Please try again.")
-            print(f"   ✓ Transcription successful: {student_input_text[:100]}")
+            logger.debug("Transcription: %.100s", student_input_text)
 
         elif text_input:
             validate_text_input(text_input)
             student_input_text = text_input
-            print(f"✍️  Using text input: {student_input_text[:100]}")
         else:
-            print("   ✗ No input provided")
             raise HTTPException(status_code=400, detail="Either audio_file or text_input must be provided")
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"   ✗ Error processing input: {str(e)}")
+        logger.error("Error processing streaming input: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-    # NOW START STREAMING THE RESPONSE
-    async def stream_response():
-        try:
-            # Generate tutor response
-            print("🤖 Generating tutor response...")
-            response_data = await reasoning_engine.generate_response(
-                session_id=session_uuid,
-                student_input=student_input_text,
-                case_id=case_id  # Pass case_id for demo sessions
-            )
-
-            tutor_response = response_data["tutor_response"]
-            reasoning_metadata = response_data["reasoning_metadata"]
-            print(f"   ✓ K2 response generated")
-
-            # Clean response for TTS
-            import re
-            clean_text = tutor_response
-            clean_text = re.sub(r'<think>.*?</think>', '', clean_text, flags=re.DOTALL)
-            clean_text = re.sub(r'<[^>]+>', '', clean_text)
-            clean_text = clean_text.strip()
-            clean_text = re.sub(r'\s+', ' ', clean_text)
-
-            if not clean_text:
-                print(f"   ⚠️  Cleaned text is empty")
-                return
-
-            if len(clean_text) > 5000:
-                clean_text = clean_text[:4997] + "..."
+    # Start K2 streaming and wait for the first sentence, so reasoning failures
+    # still surface as a 500 instead of an empty audio stream
+    try:
+        sentences, reasoning_metadata = await reasoning_engine.stream_response(
+            session_id=session_uuid,
+            student_input=student_input_text,
+            case_id=case_id  # Pass case_id for demo sessions
+        )
+        first_sentence = await sentences.__anext__()
+    except Exception as e:
+        logger.error("K2 reasoning error: %s", e)
+        raise HTTPException(status_code=500, detail=f"Failed to generate response: {str(e)}")
 
-            # Stream TTS audio chunks
-            print("🔊 Streaming TTS audio...")
-            from app.config import get_settings
-            settings = get_settings()
+    async def produce_sentences(queue: asyncio.Queue):
+        """Keep pulling sentences from K2 while earlier ones are being spoken."""
+        try:
+            async for sentence in sentences:
+                await queue.put(sentence)
+        except Exception as e:
+            logger.error("K2 streaming error: %s", e)
+        finally:
+            await queue.put(None)
 
+    # NOW START STREAMING THE AUDIO
+    async def stream_response():
+        # Tee the streamed audio so it can be stored once the client has it
+        audio_buffer = bytearray()
+        spoken = []  # cleaned sentences, in order; saved as the tutor response
+        queue = asyncio.Queue()
+        producer = asyncio.create_task(produce_sentences(queue))
+        try:
+            # Speak each sentence as soon as K2 finishes it, overlapping
+            # LLM decoding with speech synthesis
             chunk_count = 0
-            async for audio_chunk in elevenlabs_service.generate_voice_stream(
-                text=clean_text,
-                voice_id=settings.elevenlabs_voice_id
-            ):
-                if audio_chunk:
-                    chunk_count += 1
-                    print(f"   ✓ Sent chunk {chunk_count}: {len(audio_chunk)} bytes")
-                    yield audio_chunk
-
-            print(f"   ✓ Streaming complete ({chunk_count} chunks)")
-
-            # Save interaction asynchronously (don't wait for it, skip for demo sessions)
-            if not is_demo:
-                try:
-                    await supabase_service.save_interaction(
-                        session_id=session_uuid,
-                        student_input=student_input_text,
-                        tutor_response=tutor_response,
-                        audio_url=None,  # Not uploading in streaming mode
-                        response_audio_url=None,
-                        reasoning_metadata=reasoning_metadata
-                    )
-                except Exception as e:
-                    print(f"   ⚠️  Failed to save interaction: {str(e)}")
+            sentence = first_sentence
+            while sentence is not None:
+                text = _clean_response(sentence)
+                if text:
+                    previous_text = " ".join(spoken) or None
+                    spoken.append(text)
+                    async for audio_chunk in elevenlabs_service.generate_voice_stream(
+                        text=text,
+                        voice_id=_VOICE_ID,
+                        previous_text=previous_text
+                    ):
+                        if audio_chunk:
+                            chunk_count += 1
+                            audio_buffer += audio_chunk
+                            yield audio_chunk
+                sentence = await queue.get()
+
+            logger.debug("Streaming complete (%d sentences, %d chunks)", len(spoken), chunk_count)
 
         except Exception as e:
-            print(f"\n❌ ERROR in stream_response:")
-            print(f"   {type(e).__name__}: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.error("Error in stream_response: %s: %s", type(e).__name__, e, exc_info=True)
+        finally:
+            producer.cancel()
+            # Save the interaction before the stream closes so the next turn sees it
+            # (skip for demo sessions); the tutor audio is uploaded and attached to
+            # the saved row afterwards, in the background
+            if not is_demo:
+                save_task = _spawn(_safe_save_interaction(
+                    session_id=session_uuid,
+                    student_input=student_input_text,
+                    tutor_response=" ".join(spoken),
+                    audio_url=None,  # Student audio isn't stored in streaming mode
+                    reasoning_metadata=reasoning_metadata
+                ))
+                _spawn(_attach_streamed_audio(save_task, bytes(audio_buffer), session_uuid))
+                # Shielded: a client disconnect must not cancel the save itself
+                await asyncio.shield(save_task)
 
     return StreamingResponse(
         stream_response(),
@@ -1,27 +1,83 @@
 """
 Session management routes.
 """
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import asyncio
+import hashlib
+import logging
+import zlib
 from uuid import UUID
+from typing import Dict
+from urllib.parse import quote
+from app.config import get_settings
+from app.data.demo_cases import get_demo_case
 from app.models.session import SessionCreate, Session, SessionStatus
 from app.services.supabase_service import supabase_service
-from app.services.reasoning_engine import reasoning_engine
-from app.utils.validators import validate_student_id
+from app.services.elevenlabs_service import elevenlabs_service
+from app.services.reasoning_engine import reasoning_engine, extract_symptoms
+from app.utils.validators import parse_uuid, validate_student_id
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+settings = get_settings()
 router = APIRouter()
 
+# Patient voice used for greeting audio
+_VOICE_ID = settings.elevenlabs_voice_id
+
+# Demo sessions live in memory and all share the nil UUID
+_DEMO_SESSION_ID = str(UUID(int=0))
+
+# Greeting audio is served from its own URL instead of being base64-embedded
+# in the start_session response. The URL only carries the case ID, so any worker
+# can rebuild the greeting from durable data; synthesized MP3s are kept per
+# (voice, text) once they have been played through the first time.
+GREETING_AUDIO_CACHE_MAX_ENTRIES = 64
+_greeting_audio_cache: Dict[str, bytes] = {}
+
+# Used when a demo case ID isn't found
+_GENERIC_GREETING = "Hi, thanks for seeing me. I'm not sure what's going on and would appreciate your help figuring this out."
+
+
+def _cache_put(cache: dict, max_entries: int, key: str, value) -> None:
+    """Insert into a bounded cache, dropping the oldest entry (dicts keep insertion order)."""
+    if key not in cache and len(cache) >= max_entries:
+        cache.pop(next(iter(cache)))
+    cache[key] = value
+
+
+def _demo_greeting(case_id: str) -> str:
+    """Build the symptom-specific greeting for a demo case (deterministic per case ID)."""
+    demo_case_data = get_demo_case(case_id)
+    if not demo_case_data:
+        logger.warning("Demo case %s not found, using generic greeting", case_id)
+        return _GENERIC_GREETING
+
+    # Extract just the symptoms from chief complaint
+    symptoms = extract_symptoms(demo_case_data.get("chief_complaint", ""))
+
+    # Use conversational greeting templates
+    greeting_templates = [
+        f"Hi, thanks for seeing me. So I've been having {symptoms} and I'm not sure what's going on.",
+        f"Yeah, so I've been dealing with {symptoms}. It started a few days ago and it's been getting worse.",
+        f"Um, I'm not really sure what's happening, but I have {symptoms}. I'm kind of worried about it.",
+        f"Hey doc, thanks for taking me. So basically I have {symptoms} and I don't know if it's serious or what.",
+        f"So I came in today because I've been experiencing {symptoms}. Can you help me figure out what this is?"
+    ]
+
+    # Select template based on case_id for consistency; crc32 rather than hash()
+    # so every worker (and the greeting audio route) picks the same one
+    template_index = zlib.crc32(case_id.encode()) % len(greeting_templates)
+    return greeting_templates[template_index]
 
-def _is_valid_uuid(val: str) -> bool:
-    """Check if a string is a valid UUID."""
-    try:
-        UUID(val)
-        return True
-    except (ValueError, AttributeError, TypeError):
-        return False
 
+def _greeting_audio_path(case_id: str) -> str:
+    """Relative URL the greeting audio for a case streams from (the client resolves it against the API base)."""
+    return f"/api/sessions/greeting/{quote(case_id, safe='')}.mp3"
 
-@router.post("/start", response_model=dict, status_code=status.HTTP_201_CREATED)
+
+@router.post("/start", response_class=ORJSONResponse, status_code=status.HTTP_201_CREATED)
 async def start_session(session_data: SessionCreate):
     """
     Start a new clinical reasoning session.
@@ -37,19 +93,20 @@ async def start_session(session_data: SessionCreate):
         validate_student_id(session_data.student_id)
 
         # Check if this is a demo case (non-UUID string ID)
-        is_demo_case = not _is_valid_uuid(session_data.case_id)
+        case_uuid = parse_uuid(session_data.case_id)
+        is_demo_case = case_uuid is None
         case = None
+        greeting_audio_url = None
 
         if is_demo_case:
             # For demo cases, create an in-memory session without database persistence
-            session_id = str(UUID(int=0))  # Dummy session ID for demo
+            session_id = _DEMO_SESSION_ID  # Dummy session ID for demo
             case_id = session_data.case_id
             session_status = "active"
             started_at = datetime.now()
-            print(f"📌 Demo case session created in-memory for {case_id}")
+            logger.debug("Demo case session created in-memory for %s", case_id)
         else:
             # For real cases from database
-            case_uuid = UUID(session_data.case_id)
             case = await supabase_service.get_case(case_uuid)
             if not case:
                 raise HTTPException(
@@ -57,6 +114,10 @@ async def start_session(session_data: SessionCreate):
                     detail="Clinical case not found"
                 )
 
+            # Prefer the greeting precomputed at case creation
+            initial_greeting = case.greeting_text or reasoning_engine.greeting_for_case(case)
+            greeting_audio_url = case.greeting_audio_url if case.greeting_text else None
+
             # Create session in database
             session = await supabase_service.create_session(
                 case_id=case_uuid,
@@ -68,71 +129,22 @@ async def start_session(session_data: SessionCreate):
             session_status = session.status
             started_at = session.started_at
 
-        # Generate initial greeting
+        # Generate initial greeting (real cases picked theirs above)
         if is_demo_case:
             # For demo cases, generate symptom-specific greeting from demo case data
-            from app.data.demo_cases import get_demo_case
-            demo_case_data = get_demo_case(session_data.case_id)
-
-            if demo_case_data:
-                # Generate greeting based on chief_complaint
-                chief_complaint = demo_case_data.get("chief_complaint", "")
-                import re
-                # Extract just the symptoms from chief complaint
-                symptoms = chief_complaint.lower()
-                # Remove age/demographic info
-                symptoms = re.sub(r'^.*?(?:presents with|complains of|reports|with)\s+', '', symptoms)
-                symptoms = re.sub(r'\s+(?:for|over|during)\s+\d+.*?(?=\.|$)', '', symptoms)
-                symptoms = symptoms.rstrip('.')
-
-                # Use conversational greeting templates
-                greeting_templates = [
-                    f"Hi, thanks for seeing me. So I've been having {symptoms} and I'm not sure what's going on.",
-                    f"Yeah, so I've been dealing with {symptoms}. It started a few days ago and it's been getting worse.",
-                    f"Um, I'm not really sure what's happening, but I have {symptoms}. I'm kind of worried about it.",
-                    f"Hey doc, thanks for taking me. So basically I have {symptoms} and I don't know if it's serious or what.",
-                    f"So I came in today because I've been experiencing {symptoms}. Can you help me figure out what this is?"
-                ]
-
-                # Select template based on case_id for consistency
-                template_index = hash(session_data.case_id) % len(greeting_templates)
-                initial_greeting = greeting_templates[template_index]
-                print(f"📌 Generated symptom-specific greeting for demo case: {session_data.case_id}")
-            else:
-                # Fallback if case not found
-                initial_greeting = "Hi, thanks for seeing me. I'm not sure what's going on and would appreciate your help figuring this out."
-                print(f"⚠️  Demo case not found, using generic greeting")
-        else:
-            # For real cases, generate context-aware greeting
-            initial_greeting = await reasoning_engine.generate_initial_greeting(
-                case_id=case_uuid
-            )
+            initial_greeting = _demo_greeting(session_data.case_id)
 
-        # Generate TTS audio for initial greeting
-        from app.config import get_settings
-        from app.services.elevenlabs_service import elevenlabs_service
-        import base64
-
-        greeting_audio_url = None
-        try:
-            settings = get_settings()
-            greeting_audio_bytes = await elevenlabs_service.generate_voice(
-                text=initial_greeting,
-                voice_id=settings.elevenlabs_voice_id
-            )
-            if greeting_audio_bytes:
-                # Return as base64 data URL
-                audio_base64 = base64.b64encode(greeting_audio_bytes).decode('utf-8')
-                greeting_audio_url = f"data:audio/mpeg;base64,{audio_base64}"
-        except Exception as e:
-            print(f"⚠️  Failed to generate greeting audio: {str(e)}")
+        # Point the client at the streamed greeting audio unless the case has hosted audio;
+        # TTS runs when the client fetches it, so it doesn't hold up this response
+        if not greeting_audio_url:
+            greeting_audio_url = _greeting_audio_path(case_id)
 
         # Build response with case info if available
         response = {
             "session_id": session_id,
             "case_id": case_id,
             "status": session_status,
-            "started_at": started_at.isoformat(),
+            "started_at": started_at,
             "initial_greeting": initial_greeting,
             "greeting_audio_url": greeting_audio_url
         }
@@ -145,19 +157,71 @@ async def start_session(session_data: SessionCreate):
                 "learning_objectives": case.learning_objectives
             }
 
-        return response
+        # Returned directly, so the decorator's status_code doesn't apply
+        return ORJSONResponse(response, status_code=status.HTTP_201_CREATED)
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error starting session: {str(e)}")
+        logger.error("Error starting session: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to start session: {str(e)}"
         )
 
 
-@router.get("/{session_id}", response_model=dict)
+@router.get("/greeting/{case_id}.mp3")
+async def get_greeting_audio(case_id: str):
+    """
+    Stream a case's session greeting as MP3.
+    
+    Args:
+        case_id: Case UUID, or a demo case ID (e.g., "case-1")
+        
+    Returns:
+        Greeting audio (from cache, or streamed from ElevenLabs as it's synthesized)
+    """
+    case_uuid = parse_uuid(case_id)
+    if case_uuid is None:
+        text = _demo_greeting(case_id)
+    else:
+        case = await supabase_service.get_case(case_uuid)
+        if not case:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Clinical case not found"
+            )
+        text = case.greeting_text or reasoning_engine.greeting_for_case(case)
+    voice_id = _VOICE_ID
+
+    greeting_key = hashlib.blake2b(f"{voice_id}\n{text}".encode(), digest_size=16).hexdigest()
+    cached = _greeting_audio_cache.get(greeting_key)
+    if cached is not None:
+        return Response(content=cached, media_type="audio/mpeg")
+
+    chunks = elevenlabs_service.generate_voice_stream(text=text, voice_id=voice_id)
+    try:
+        # Wait for the first chunk so a TTS failure is an error, not an empty 200
+        first_chunk = await chunks.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Failed to generate greeting audio"
+        )
+
+    async def stream_and_cache():
+        audio_buffer = bytearray(first_chunk)
+        yield first_chunk
+        async for chunk in chunks:
+            audio_buffer.extend(chunk)
+            yield chunk
+        # Not reached if the client disconnects mid-stream, so aborted plays aren't cached
+        _cache_put(_greeting_audio_cache, GREETING_AUDIO_CACHE_MAX_ENTRIES, greeting_key, bytes(audio_buffer))
+
+    return StreamingResponse(stream_and_cache(), media_type="audio/mpeg")
+
+
+@router.get("/{session_id}", response_class=ORJSONResponse)
 async def get_session(session_id: UUID):
     """
     Get session details and interaction history.
@@ -169,52 +233,41 @@ async def get_session(session_id: UUID):
         Session data with full interaction history
     """
     try:
-        # Get session
-        session = await supabase_service.get_session(session_id)
-        if not session:
+        # Get session, case info and interactions in one query
+        bundle = await supabase_service.get_session_bundle(session_id)
+        if not bundle:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Session not found"
             )
+        session, case, interactions = bundle
         
-        # Get interactions
-        interactions = await supabase_service.get_session_history(session_id)
-        
-        # Get case info
-        case = await supabase_service.get_case(session.case_id)
-        
-        return {
-            "session_id": str(session.id),
-            "case_id": str(session.case_id),
+        # Returned as a response directly: skips response_model validation, and
+        # orjson encodes the UUIDs, enum and datetimes natively in C
+        return ORJSONResponse({
+            "session_id": session.id,
+            "case_id": session.case_id,
             "student_id": session.student_id,
             "status": session.status,
-            "started_at": session.started_at.isoformat(),
-            "completed_at": session.completed_at.isoformat() if session.completed_at else None,
+            "started_at": session.started_at,
+            "completed_at": session.completed_at,
             "case_title": case.title if case else "Unknown",
             "interaction_count": len(interactions),
-            "interactions": [
-                {
-                    "interaction_number": i.interaction_number,
-                    "student_input": i.student_input,
-                    "tutor_response": i.tutor_response,
-                    "timestamp": i.timestamp.isoformat(),
-                    "reasoning_metadata": i.reasoning_metadata
-                }
-                for i in interactions
-            ]
-        }
+            # Rows are already projected to the response fields; no per-row rebuild
+            "interactions": interactions
+        })
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error fetching session: {str(e)}")
+        logger.error("Error fetching session: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch session: {str(e)}"
         )
 
 
-@router.post("/{session_id}/complete", response_model=dict)
+@router.post("/{session_id}/complete", response_class=ORJSONResponse)
 async def complete_session(session_id: UUID, case_id: str = None):
     """
     Mark a session as completed and get evaluation.
@@ -228,12 +281,13 @@ async def complete_session(session_id: UUID, case_id: str = None):
     """
     try:
         # Check if this is a demo session (dummy UUID)
-        is_demo_session = str(session_id) == "00000000-0000-0000-0000-000000000000"
+        is_demo_session = session_id.int == 0
 
         if is_demo_session:
             # For demo sessions, skip database operations
-            print(f"✓ Demo session completion for {case_id}")
+            logger.debug("Demo session completion for %s", case_id)
             updated_session = None
+            session_bundle = None
             session_status = "completed"
             completed_at = datetime.now()
         else:
@@ -245,32 +299,38 @@ async def complete_session(session_id: UUID, case_id: str = None):
                     detail="Session not found"
                 )
 
-            # Update status
-            updated_session = await supabase_service.update_session_status(
-                session_id=session_id,
-                status=SessionStatus.COMPLETED
+            # Update status, prefetching the evaluation context while the write is in flight
+            updated_session, session_bundle = await asyncio.gather(
+                supabase_service.update_session_status(
+                    session_id=session_id,
+                    status=SessionStatus.COMPLETED
+                ),
+                supabase_service.get_session_bundle(session_id, interaction_columns="*")
             )
             session_status = updated_session.status
             completed_at = updated_session.completed_at
 
         # Get evaluation (pass case_id for demo sessions)
-        evaluation = await reasoning_engine.evaluate_session(session_id, case_id=case_id)
-        print(f"✅ Evaluation returned: {evaluation}")
+        evaluation = await reasoning_engine.evaluate_session(
+            session_id,
+            case_id=case_id,
+            session_bundle=session_bundle
+        )
 
         response = {
-            "session_id": str(session_id),
+            "session_id": session_id,
             "status": session_status,
-            "completed_at": completed_at.isoformat() if completed_at else None,
+            "completed_at": completed_at,
             "evaluation": evaluation.get("evaluation"),
             "summary": evaluation.get("summary")
         }
-        print(f"📋 Final response: {response}")
-        return response
+        logger.debug("Session %s completed: %r", session_id, response)
+        return ORJSONResponse(response)
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error completing session: {str(e)}")
+        logger.error("Error completing session: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to complete session: {str(e)}"
@@ -3,16 +3,115 @@ Case generator that converts Reddit posts into realistic patient scenarios.
 Uses Claude to extract patient data and SafetyKit to filter for appropriate content.
 """
 
+import copy
+import hashlib
 import logging
-import json
-import httpx
+import re
+import orjson
 from typing import Dict, Any, Optional, List
 import anthropic
 from app.config import get_settings
+from app.utils.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Generated cases keyed by a hash of the post content they were built from,
+# so re-ingesting the same post skips SafetyKit and Claude entirely
+CASE_CACHE_MAX_ENTRIES = 4096
+
+# Local precheck before SafetyKit: posts that are short and mention none of
+# these terms are treated as safe without the remote call. Anything that
+# trips a keyword or is long enough to hide something still goes to SafetyKit.
+_UNSAFE_KEYWORDS = frozenset({
+    "suicide", "suicidal", "self-harm", "self harm", "kill myself", "end my life",
+    "overdose", "abuse", "abused", "rape", "assault", "weapon", "gun", "bomb",
+    "minor", "underage", "scam", "fraud", "bitcoin", "crypto", "venmo", "cashapp",
+    "paypal", "miracle cure", "cure cancer", "detox", "anti-vax", "antivax",
+})
+_UNSAFE_PATTERN = re.compile(
+    r"\b(?:" + "|".join(sorted(map(re.escape, _UNSAFE_KEYWORDS), key=len, reverse=True)) + r")\b",
+    re.IGNORECASE
+)
+SAFETY_FAST_PATH_MAX_CHARS = 2000
+
+# Claude prompts; the JSON examples use doubled braces for str.format
+_EXTRACTION_PROMPT = """Extract medical case information from this Reddit post. Focus on what would be clinically relevant for a student doctor to diagnose.
+
+REDDIT POST:
+Title: {title}
+Body: {body}
+{comments_text}
+
+Extract and return ONLY valid JSON (no markdown, no extra text) with this exact structure:
+
+{{
+  "title": "Brief case title (e.g., 'Chest Pain in Middle-Aged Male')",
+  "chief_complaint": "Main symptom/reason for visit",
+  "clinical_scenario": {{
+    "patient_info": {{
+      "name": "Patient Name or 'John' if not specified",
+      "age": 35,
+      "gender": "M/F/Other or 'Unknown'",
+      "occupation": "occupation if mentioned or null"
+    }},
+    "symptoms": ["symptom 1", "symptom 2"],
+    "medical_history": ["condition 1", "condition 2"],
+    "current_medications": ["medication 1"] or [],
+    "timeline": "When did symptoms start?",
+    "social_history": "smoking, alcohol, drugs if mentioned",
+    "writing_style": "Brief description of how the patient communicates - formal, anxious, casual, etc"
+  }},
+  "differential_diagnoses": {{
+    "likely_diagnosis_1": "Brief description of why this fits",
+    "likely_diagnosis_2": "Brief description"
+  }},
+  "red_flags": ["critical finding 1", "critical finding 2"],
+  "learning_objectives": ["What should student learn from this case?"],
+  "source": "reddit",
+  "original_url": "{url}"
+}}
+
+IMPORTANT:
+- Be realistic - if age not mentioned, set to null or "Unknown"
+- Extract actual symptoms mentioned, not assumptions
+- Identify real red flags that a doctor should ask about
+- Focus on what a student doctor should diagnose
+- Make sure differential diagnoses match the presenting symptoms
+"""
+
+_PERSONALITY_PROMPT = """Based on this Reddit post, describe the patient's personality and communication style in 2-3 sentences.
+
+REDDIT POST:
+{body}
+
+Return ONLY a valid JSON object (no markdown):
+{{
+  "personality": "One sentence about their personality",
+  "communication_style": "One sentence about how they communicate",
+  "emotional_state": "One sentence about their emotional state (anxious, calm, frustrated, etc)"
+}}"""
+
+# Markdown code fence Claude sometimes wraps its JSON in
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.S)
+
+
+def _strip_code_fence(text: str) -> str:
+    """Return the body of the first fenced code block, or the text unchanged."""
+    match = _FENCE_RE.search(text)
+    return match.group(1) if match else text
+
+
+def _post_cache_key(reddit_post: Dict[str, Any], comments: Optional[List[Dict[str, str]]]) -> str:
+    """Hash exactly the post fields that feed the safety check and extraction prompt."""
+    content = orjson.dumps([
+        reddit_post["title"],
+        reddit_post["body"],
+        reddit_post.get("url"),
+        [c["body"] for c in comments[:3]] if comments else []
+    ])
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
 
 class SafetyKitFilter:
     """Filters content using SafetyKit API for fraud/abuse detection."""
@@ -35,7 +134,8 @@ class SafetyKitFilter:
                 "is_safe": bool,
                 "risk_level": "low" | "medium" | "high",
                 "flags": list of detected issues,
-                "confidence": float
+                "confidence": float (0.0 when SafetyKit wasn't consulted),
+                "source": "safetykit" | "local_precheck" (only on checked results)
             }
         """
         if not self.headers:
@@ -47,34 +147,46 @@ class SafetyKitFilter:
                 "confidence": 0.0
             }
 
+        # Cheap local filter first; only suspicious or long posts pay for the HTTPS call
+        if len(text) < SAFETY_FAST_PATH_MAX_CHARS and not _UNSAFE_PATTERN.search(text):
+            return {
+                "is_safe": True,
+                "risk_level": "low",
+                "flags": [],
+                "confidence": 0.0,
+                "source": "local_precheck"
+            }
+
         try:
             # Note: Actual SafetyKit endpoint may differ - check their API docs
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    f"{self.api_base}/content/check",
-                    headers=self.headers,
-                    json={
-                        "text": text,
-                        "categories": ["fraud", "abuse", "harmful", "misinformation"]
-                    }
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    return {
-                        "is_safe": data.get("is_safe", True),
-                        "risk_level": data.get("risk_level", "low"),
-                        "flags": data.get("flags", []),
-                        "confidence": data.get("confidence", 0.0)
-                    }
-                else:
-                    logger.warning(f"SafetyKit API returned {response.status_code}")
-                    return {
-                        "is_safe": True,
-                        "risk_level": "unknown",
-                        "flags": [],
-                        "confidence": 0.0
-                    }
+            client = get_http_client()
+            response = await client.post(
+                f"{self.api_base}/content/check",
+                headers=self.headers,
+                json={
+                    "text": text,
+                    "categories": ["fraud", "abuse", "harmful", "misinformation"]
+                },
+                timeout=10.0
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                return {
+                    "is_safe": data.get("is_safe", True),
+                    "risk_level": data.get("risk_level", "low"),
+                    "flags": data.get("flags", []),
+                    "confidence": data.get("confidence", 0.0),
+                    "source": "safetykit"
+                }
+            else:
+                logger.warning(f"SafetyKit API returned {response.status_code}")
+                return {
+                    "is_safe": True,
+                    "risk_level": "unknown",
+                    "flags": [],
+                    "confidence": 0.0
+                }
 
         except Exception as e:
             logger.error(f"SafetyKit error: {e}")
@@ -92,8 +204,16 @@ class CaseGenerator:
 
     def __init__(self):
         """Initialize with Claude and SafetyKit clients."""
-        self.claude_client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
+        self.claude_client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
         self.safety_filter = SafetyKitFilter()
+        self._case_cache: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    def _cache_case(self, key: str, case_data: Optional[Dict[str, Any]]) -> None:
+        """Remember the outcome for a post (None = flagged unsafe)."""
+        if len(self._case_cache) >= CASE_CACHE_MAX_ENTRIES:
+            # Drop the oldest entry (dicts keep insertion order)
+            self._case_cache.pop(next(iter(self._case_cache)))
+        self._case_cache[key] = case_data
 
     async def generate_case_from_post(
         self,
@@ -111,6 +231,12 @@ class CaseGenerator:
             Case object or None if filtered out
         """
         try:
+            cache_key = _post_cache_key(reddit_post, comments)
+            if cache_key in self._case_cache:
+                cached = self._case_cache[cache_key]
+                # Copy so callers (e.g. enhance_personality_from_post) can't mutate the cached case
+                return copy.deepcopy(cached) if cached is not None else None
+
             # Check safety first
             combined_text = reddit_post["title"] + "\n" + reddit_post["body"]
             if comments:
@@ -120,6 +246,7 @@ class CaseGenerator:
 
             if not safety_check["is_safe"]:
                 logger.warning(f"Post {reddit_post['id']} flagged as unsafe: {safety_check['flags']}")
+                self._cache_case(cache_key, None)
                 return None
 
             # Use Claude to extract patient data
@@ -131,6 +258,8 @@ class CaseGenerator:
 
             # Add safety metadata
             case_data["safety_check"] = safety_check
+            # Extraction failures above aren't cached, so they get retried next time
+            self._cache_case(cache_key, copy.deepcopy(case_data))
 
             logger.info(f"✅ Generated case from post {reddit_post['id']}: {case_data.get('title')}")
             return case_data
@@ -155,51 +284,14 @@ class CaseGenerator:
                     f"- {c['body']}" for c in comments[:3]
                 ])
 
-            prompt = f"""Extract medical case information from this Reddit post. Focus on what would be clinically relevant for a student doctor to diagnose.
-
-REDDIT POST:
-Title: {reddit_post['title']}
-Body: {reddit_post['body']}
-{comments_text}
-
-Extract and return ONLY valid JSON (no markdown, no extra text) with this exact structure:
-
-{{
-  "title": "Brief case title (e.g., 'Chest Pain in Middle-Aged Male')",
-  "chief_complaint": "Main symptom/reason for visit",
-  "clinical_scenario": {{
-    "patient_info": {{
-      "name": "Patient Name or 'John' if not specified",
-      "age": 35,
-      "gender": "M/F/Other or 'Unknown'",
-      "occupation": "occupation if mentioned or null"
-    }},
-    "symptoms": ["symptom 1", "symptom 2"],
-    "medical_history": ["condition 1", "condition 2"],
-    "current_medications": ["medication 1"] or [],
-    "timeline": "When did symptoms start?",
-    "social_history": "smoking, alcohol, drugs if mentioned",
-    "writing_style": "Brief description of how the patient communicates - formal, anxious, casual, etc"
-  }},
-  "differential_diagnoses": {{
-    "likely_diagnosis_1": "Brief description of why this fits",
-    "likely_diagnosis_2": "Brief description"
-  }},
-  "red_flags": ["critical finding 1", "critical finding 2"],
-  "learning_objectives": ["What should student learn from this case?"],
-  "source": "reddit",
-  "original_url": "{reddit_post['url']}"
-}}
-
-IMPORTANT:
-- Be realistic - if age not mentioned, set to null or "Unknown"
-- Extract actual symptoms mentioned, not assumptions
-- Identify real red flags that a doctor should ask about
-- Focus on what a student doctor should diagnose
-- Make sure differential diagnoses match the presenting symptoms
-"""
+            prompt = _EXTRACTION_PROMPT.format(
+                title=reddit_post['title'],
+                body=reddit_post['body'],
+                comments_text=comments_text,
+                url=reddit_post['url']
+            )
 
-            message = self.claude_client.messages.create(
+            message = await self.claude_client.messages.create(
                 model="claude-opus-4-6",  # Use more capable model for extraction
                 max_tokens=2000,
                 messages=[
@@ -213,15 +305,10 @@ IMPORTANT:
             # Try to parse JSON
             try:
                 # Remove markdown code blocks if present
-                if "```json" in response_text:
-                    response_text = response_text.split("```json")[1].split("```")[0]
-                elif "```" in response_text:
-                    response_text = response_text.split("```")[1].split("```")[0]
-
-                case_data = json.loads(response_text.strip())
+                case_data = orjson.loads(_strip_code_fence(response_text).strip())
                 return case_data
 
-            except json.JSONDecodeError as e:
+            except orjson.JSONDecodeError as e:
                 logger.error(f"Failed to parse Claude response as JSON: {e}")
                 logger.error(f"Response was: {response_text[:200]}")
                 return None
@@ -239,19 +326,9 @@ IMPORTANT:
         Use Claude to enhance patient persona personality from Reddit post writing style.
         """
         try:
-            prompt = f"""Based on this Reddit post, describe the patient's personality and communication style in 2-3 sentences.
-
-REDDIT POST:
-{reddit_post['body'][:500]}
-
-Return ONLY a valid JSON object (no markdown):
-{{
-  "personality": "One sentence about their personality",
-  "communication_style": "One sentence about how they communicate",
-  "emotional_state": "One sentence about their emotional state (anxious, calm, frustrated, etc)"
-}}"""
+            prompt = _PERSONALITY_PROMPT.format(body=reddit_post['body'][:500])
 
-            message = self.claude_client.messages.create(
+            message = await self.claude_client.messages.create(
                 model="claude-haiku-4-5-20251001",  # Fast, cheap model for enhancement
                 max_tokens=300,
                 messages=[
@@ -262,10 +339,7 @@ Return ONLY a valid JSON object (no markdown):
             response_text = message.content[0].text.strip()
 
             # Parse JSON
-            if "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0]
-
-            personality_data = json.loads(response_text.strip())
+            personality_data = orjson.loads(_strip_code_fence(response_text).strip())
 
             # Add to clinical_scenario
             case_data["clinical_scenario"]["personality"] = personality_data
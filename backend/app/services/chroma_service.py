@@ -4,7 +4,7 @@ Used to inform case generation with evidence-based medical information.
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import chromadb
 
 logger = logging.getLogger(__name__)
@@ -41,6 +41,45 @@ class ChromaService:
                 logger.error(f"Failed to create medical collection: {e}")
                 self.client = None
 
+    @staticmethod
+    def _build_entry(
+        condition: str,
+        symptoms: List[str],
+        differentials: List[str],
+        red_flags: List[str],
+        diagnostic_approach: str,
+        treatment_overview: str,
+        evidence_level: str = "High"
+    ) -> Tuple[str, str, Dict[str, Any]]:
+        """Build the (id, document, metadata) triple stored for a condition."""
+        document = f"""
+CONDITION: {condition}
+
+SYMPTOMS:
+{chr(10).join([f"- {s}" for s in symptoms])}
+
+DIFFERENTIAL DIAGNOSES:
+{chr(10).join([f"- {d}" for d in differentials])}
+
+RED FLAGS (Critical Warning Signs):
+{chr(10).join([f"- {f}" for f in red_flags])}
+
+DIAGNOSTIC APPROACH:
+{diagnostic_approach}
+
+TREATMENT OVERVIEW:
+{treatment_overview}
+
+EVIDENCE LEVEL: {evidence_level}
+"""
+        doc_id = f"condition_{condition.lower().replace(' ', '_')}"
+        metadata = {
+            "condition": condition,
+            "evidence_level": evidence_level,
+            "symptom_count": len(symptoms)
+        }
+        return doc_id, document, metadata
+
     async def add_medical_knowledge(
         self,
         condition: str,
@@ -71,39 +110,16 @@ class ChromaService:
             return None
 
         try:
-            # Create comprehensive document
-            document = f"""
-CONDITION: {condition}
-
-SYMPTOMS:
-{chr(10).join([f"- {s}" for s in symptoms])}
-
-DIFFERENTIAL DIAGNOSES:
-{chr(10).join([f"- {d}" for d in differentials])}
-
-RED FLAGS (Critical Warning Signs):
-{chr(10).join([f"- {f}" for f in red_flags])}
-
-DIAGNOSTIC APPROACH:
-{diagnostic_approach}
-
-TREATMENT OVERVIEW:
-{treatment_overview}
-
-EVIDENCE LEVEL: {evidence_level}
-"""
-
-            doc_id = f"condition_{condition.lower().replace(' ', '_')}"
+            doc_id, document, metadata = self._build_entry(
+                condition, symptoms, differentials, red_flags,
+                diagnostic_approach, treatment_overview, evidence_level
+            )
 
             # Add to collection
             self.medical_collection.add(
                 ids=[doc_id],
                 documents=[document],
-                metadatas=[{
-                    "condition": condition,
-                    "evidence_level": evidence_level,
-                    "symptom_count": len(symptoms)
-                }]
+                metadatas=[metadata]
             )
 
             logger.info(f"✅ Added medical knowledge for {condition}")
@@ -158,20 +174,23 @@ EVIDENCE LEVEL: {evidence_level}
             logger.error(f"Error retrieving medical context: {e}")
             return []
 
-    async def seed_common_conditions(self):
+    async def seed_common_conditions(self) -> bool:
         """
         Seed ChromaDB with common medical conditions.
         Only runs if collection is empty.
+
+        Returns:
+            True if the collection is seeded (now or already), False on failure
         """
         if not self.medical_collection:
-            return
+            return False
 
         try:
             # Check if already seeded
             count = self.medical_collection.count()
             if count > 0:
                 logger.info(f"✅ ChromaDB already seeded with {count} conditions")
-                return
+                return True
 
             logger.info("🌱 Seeding ChromaDB with common conditions...")
 
@@ -218,13 +237,21 @@ EVIDENCE LEVEL: {evidence_level}
                 }
             ]
 
-            for cond in conditions:
-                await self.add_medical_knowledge(**cond)
+            # One add() with parallel id/document/metadata lists, so the
+            # embeddings are computed in a single batch
+            ids, documents, metadatas = zip(*(self._build_entry(**cond) for cond in conditions))
+            self.medical_collection.add(
+                ids=list(ids),
+                documents=list(documents),
+                metadatas=list(metadatas)
+            )
 
             logger.info(f"✅ Seeded {len(conditions)} medical conditions")
+            return True
 
         except Exception as e:
             logger.error(f"Error seeding conditions: {e}")
+            return False
 
 
 # Initialize service
@@ -6,12 +6,13 @@ Uses Featherless/K2 for case synthesis when available.
 
 import logging
 import json
-import httpx
 import xml.etree.ElementTree as ET
 import re
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 from app.config import get_settings
-from app.services.kimi_service import KimiService
+from app.services.kimi_service import kimi_service
+from app.utils.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -24,10 +25,8 @@ class LiteratureCaseGenerator:
     """
 
     def __init__(self):
-        # Reload settings to get latest env vars
-        from app.config import get_settings
-        current_settings = get_settings()
-        self.kimi = KimiService()
+        # Share the process-wide Kimi client instead of building another one
+        self.kimi = kimi_service
         logger.info("✅ Literature-based case generator initialized")
         
     async def generate_case_from_literature(
@@ -182,65 +181,61 @@ Return ONLY a JSON object (no markdown, no code block, no thinking) with these e
             logger.info(f"🔍 Searching PubMed for REAL literature: {query}")
 
             # PubMed E-utilities API
-            async with httpx.AsyncClient(timeout=20.0) as client:
-                # Search for article IDs (returns XML with title info)
-                search_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-                search_params = {
-                    "db": "pubmed",
-                    "term": query,
-                    "retmax": max_results,
-                    "rettype": "full",
-                    "retmode": "xml"
-                }
-
-                search_response = await client.get(search_url, params=search_params)
-                search_response.raise_for_status()
-
-                # Parse XML response to extract article IDs
-                results = []
-                try:
-                    root = ET.fromstring(search_response.text)
-
-                    # Extract PMIDs from IdList/Id elements
-                    id_list = root.find("IdList")
-                    if id_list is not None:
-                        for id_elem in id_list.findall("Id"):
-                            if id_elem.text:
-                                pmid = id_elem.text
-
-                                results.append({
-                                    "id": pmid,
-                                    "title": f"PubMed Article {pmid}",
-                                    "abstract": f"Medical literature case report from PubMed",
-                                    "pmid": pmid,
-                                    "url": f"https://pubmed.ncbi.nlm.nih.gov/{pmid}"
-                                })
-
-                                if len(results) >= max_results:
-                                    break
-
-                except ET.ParseError as e:
-                    logger.error(f"Failed to parse PubMed XML: {str(e)}")
-                    return []
-
-                if not results:
-                    logger.warning(f"No PubMed results found for: {query}")
-                    return []
-
-                logger.info(f"✅ Found {len(results)} REAL PubMed articles (PMIDs: {[r['pmid'] for r in results]})")
-                return results
+            client = get_http_client()
+            # Search for article IDs (returns XML with title info)
+            search_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+            search_params = {
+                "db": "pubmed",
+                "term": query,
+                "retmax": max_results,
+                "rettype": "full",
+                "retmode": "xml"
+            }
+
+            search_response = await client.get(search_url, params=search_params, timeout=20.0)
+            search_response.raise_for_status()
+
+            # Parse XML response to extract article IDs
+            results = []
+            try:
+                root = ET.fromstring(search_response.text)
+
+                # Extract PMIDs from IdList/Id elements
+                id_list = root.find("IdList")
+                if id_list is not None:
+                    for id_elem in id_list.findall("Id"):
+                        if id_elem.text:
+                            pmid = id_elem.text
+
+                            results.append({
+                                "id": pmid,
+                                "title": f"PubMed Article {pmid}",
+                                "abstract": f"Medical literature case report from PubMed",
+                                "pmid": pmid,
+                                "url": f"https://pubmed.ncbi.nlm.nih.gov/{pmid}"
+                            })
+
+                            if len(results) >= max_results:
+                                break
+
+            except ET.ParseError as e:
+                logger.error(f"Failed to parse PubMed XML: {str(e)}")
+                return []
+
+            if not results:
+                logger.warning(f"No PubMed results found for: {query}")
+                return []
+
+            logger.info(f"✅ Found {len(results)} REAL PubMed articles (PMIDs: {[r['pmid'] for r in results]})")
+            return results
 
         except Exception as e:
             logger.error(f"❌ PubMed search error: {str(e)}")
             return []
 
 
-# Global instance (created on first use)
-_generator_instance = None
-
+# Global instance (created on first use, then cached)
+@lru_cache(maxsize=1)
 def get_dedalus_agent() -> LiteratureCaseGenerator:
     """Get or create the literature case generator instance."""
-    global _generator_instance
-    if _generator_instance is None:
-        _generator_instance = LiteratureCaseGenerator()
-    return _generator_instance
+    return LiteratureCaseGenerator()
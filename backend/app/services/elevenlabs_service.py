@@ -1,7 +1,13 @@
+import asyncio
+import logging
 import httpx
 import assemblyai as aai
 from app.config import get_settings
 import io
+from app.utils.http_client import get_http_client
+from typing import BinaryIO, Optional, Union
+
+logger = logging.getLogger(__name__)
 
 
 class ElevenLabsService:
@@ -13,7 +19,6 @@ class ElevenLabsService:
     @property
     def api_key(self):
         """Get API key from settings"""
-        from app.config import get_settings
         settings = get_settings()
         return settings.elevenlabs_api_key
 
@@ -22,12 +27,13 @@ class ElevenLabsService:
         """Get headers with fresh API key"""
         return {"xi-api-key": self.api_key}
 
-    async def transcribe_audio(self, audio_data: bytes) -> dict:
+    async def transcribe_audio(self, audio_data: Union[bytes, BinaryIO]) -> dict:
         """
         Transcribe audio file using AssemblyAI API
 
         Args:
-            audio_data: Raw audio bytes (webm format)
+            audio_data: Raw audio bytes (webm format), or a binary file object
+                that the SDK uploads in chunks without copying it into memory
 
         Returns:
             Dictionary with transcription result
@@ -37,32 +43,29 @@ class ElevenLabsService:
             settings = get_settings()
             aai.settings.api_key = settings.assemblyai_api_key
 
-            print(f"🎤 AssemblyAI Transcription Starting...")
-            print(f"   Audio size: {len(audio_data)} bytes")
-
             # Create transcriber with universal-3-pro model
             transcriber = aai.Transcriber()
 
-            # AssemblyAI expects file path or URL, so we'll upload the audio
-            # Convert bytes to file-like object
-            audio_file = io.BytesIO(audio_data)
+            # AssemblyAI expects file path, URL or file object; wrap raw bytes
+            audio_file = io.BytesIO(audio_data) if isinstance(audio_data, bytes) else audio_data
 
             # Configure transcription with speech models (list)
             config = aai.TranscriptionConfig(speech_models=["universal-2"])
 
             # Transcribe using AssemblyAI
-            print(f"   Sending to AssemblyAI...")
-            transcript = transcriber.transcribe(audio_file, config=config)
+            # The SDK call blocks until transcription finishes; keep it off the event loop
+            transcript = await asyncio.to_thread(transcriber.transcribe, audio_file, config=config)
 
-            print(f"   AssemblyAI response received")
-            print(f"   Status: {transcript.status}")
-            print(f"   Text: '{transcript.text}'")
-            print(f"   Text length: {len(transcript.text) if transcript.text else 0}")
-            print(f"   Confidence: {transcript.confidence if hasattr(transcript, 'confidence') else 'N/A'}")
-            print(f"   Audio duration: {transcript.audio_duration if hasattr(transcript, 'audio_duration') else 'N/A'}s")
+            logger.debug(
+                "AssemblyAI transcript status=%s chars=%d confidence=%s duration=%ss",
+                transcript.status,
+                len(transcript.text) if transcript.text else 0,
+                getattr(transcript, "confidence", "N/A"),
+                getattr(transcript, "audio_duration", "N/A"),
+            )
 
             if transcript.status == aai.TranscriptStatus.error:
-                print(f"   ✗ Transcription error: {transcript.error}")
+                logger.warning("Transcription error: %s", transcript.error)
                 return {
                     "success": False,
                     "error": transcript.error,
@@ -72,12 +75,8 @@ class ElevenLabsService:
             transcript_text = transcript.text if transcript.text else ""
 
             if not transcript_text or transcript_text.strip() == "":
-                print(f"   ⚠️  Warning: Transcription completed but text is empty")
-                print(f"   This usually means:")
-                print(f"      - Audio was too short (< 0.5 seconds)")
-                print(f"      - No speech detected in audio")
-                print(f"      - Audio volume too low")
-                print(f"      - Background noise only")
+                # Usually audio too short (< 0.5s), no speech, low volume or background noise only
+                logger.info("Transcription completed but text is empty")
 
             return {
                 "transcript": transcript_text,
@@ -85,9 +84,7 @@ class ElevenLabsService:
                 "duration_seconds": transcript.audio_duration if hasattr(transcript, 'audio_duration') else 0,
             }
         except Exception as e:
-            print(f"   ✗ Transcription exception: {type(e).__name__}: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error("Transcription exception: %s: %s", type(e).__name__, e, exc_info=True)
             return {
                 "success": False,
                 "error": str(e),
@@ -98,17 +95,17 @@ class ElevenLabsService:
         Get list of available voices from ElevenLabs
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/v1/voices",
-                    headers=self.headers,
-                    timeout=10.0,
-                )
-                response.raise_for_status()
-                data = response.json()
-                return data.get("voices", [])
+            client = get_http_client()
+            response = await client.get(
+                f"{self.base_url}/v1/voices",
+                headers=self.headers,
+                timeout=10.0,
+            )
+            response.raise_for_status()
+            data = response.json()
+            return data.get("voices", [])
         except Exception as e:
-            print(f"Error getting voices: {e}")
+            logger.warning("Error getting voices: %s", e)
             return []
 
     async def generate_voice(self, text: str, voice_id: str = "21m00Tcm4TlvDq8ikWAM") -> bytes:
@@ -123,48 +120,47 @@ class ElevenLabsService:
             Audio bytes
         """
         try:
-            print(f"🔊 ElevenLabs TTS Starting...")
-            print(f"   Text length: {len(text)} characters")
-            print(f"   Text preview: {text[:200]}..." if len(text) > 200 else f"   Text: {text}")
-            print(f"   Voice ID: {voice_id}")
-            print(f"   API Key: {self.api_key[:10]}...{self.api_key[-4:]}")
-
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/v1/text-to-speech/{voice_id}",
-                    headers=self.headers,
-                    json={
-                        "text": text,
-                        "model_id": "eleven_turbo_v2_5",
-                        "voice_settings": {
-                            "stability": 0.5,
-                            "similarity_boost": 0.75,
-                        },
+            logger.debug("ElevenLabs TTS: %d chars, voice %s: %.200s", len(text), voice_id, text)
+
+            client = get_http_client()
+            response = await client.post(
+                f"{self.base_url}/v1/text-to-speech/{voice_id}",
+                headers=self.headers,
+                json={
+                    "text": text,
+                    "model_id": "eleven_turbo_v2_5",
+                    "voice_settings": {
+                        "stability": 0.5,
+                        "similarity_boost": 0.75,
                     },
-                    timeout=30.0,
-                )
+                },
+                timeout=30.0,
+            )
 
-                print(f"   HTTP Status: {response.status_code}")
+            if response.status_code != 200:
+                logger.warning("TTS error response %s: %.500s", response.status_code, response.text)
 
-                if response.status_code != 200:
-                    print(f"   ✗ Error response body: {response.text[:500]}")
+            response.raise_for_status()
 
-                response.raise_for_status()
-
-                audio_bytes = response.content
-                print(f"   ✓ TTS audio generated: {len(audio_bytes)} bytes")
-                return audio_bytes
+            audio_bytes = response.content
+            logger.debug("TTS audio generated: %d bytes", len(audio_bytes))
+            return audio_bytes
 
         except httpx.HTTPStatusError as e:
-            print(f"   ✗ TTS Error: {e.response.status_code}")
+            logger.warning("TTS error: %s", e.response.status_code)
             return b""
-        except httpx.TimeoutException as e:
-            print(f"   ✗ TTS Timeout")
+        except httpx.TimeoutException:
+            logger.warning("TTS timeout")
             return b""
         except Exception as e:
-            print(f"   ✗ TTS Failed: {str(e)}")
+            logger.warning("TTS failed: %s", e)
             return b""
-    async def generate_voice_stream(self, text: str, voice_id: str = "21m00Tcm4TlvDq8ikWAM"):
+    async def generate_voice_stream(
+        self,
+        text: str,
+        voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+        previous_text: Optional[str] = None
+    ):
         """
         Generate voice from text using ElevenLabs streaming API.
         Yields audio chunks as they're generated.
@@ -172,58 +168,48 @@ class ElevenLabsService:
         Args:
             text: Text to convert to speech
             voice_id: ElevenLabs voice ID (default is "Bella")
+            previous_text: Text already spoken, so prosody continues naturally
+                when a response is synthesized sentence by sentence
 
         Yields:
             Audio bytes chunks
         """
         try:
-            print(f"🔊 ElevenLabs Streaming TTS Starting...")
-            print(f"   Text length: {len(text)} characters")
-            print(f"   Voice ID: {voice_id}")
-
-            async with httpx.AsyncClient() as client:
-                async with client.stream(
-                    "POST",
-                    f"{self.base_url}/v1/text-to-speech/{voice_id}/stream",
-                    headers=self.headers,
-                    json={
-                        "text": text,
-                        "model_id": "eleven_turbo_v2_5",
-                        "voice_settings": {
-                            "stability": 0.5,
-                            "similarity_boost": 0.75,
-                        },
-                    },
-                    timeout=30.0,
-                ) as response:
-                    print(f"   HTTP Status: {response.status_code}")
-
-                    if response.status_code != 200:
-                        print(f"   ✗ Error response: {await response.aread()}")
-                        return
+            logger.debug("ElevenLabs streaming TTS: %d chars, voice %s", len(text), voice_id)
+
+            payload = {
+                "text": text,
+                "model_id": "eleven_turbo_v2_5",
+                "voice_settings": {
+                    "stability": 0.5,
+                    "similarity_boost": 0.75,
+                },
+            }
+            if previous_text:
+                payload["previous_text"] = previous_text
+
+            client = get_http_client()
+            async with client.stream(
+                "POST",
+                f"{self.base_url}/v1/text-to-speech/{voice_id}/stream",
+                headers=self.headers,
+                json=payload,
+                timeout=30.0,
+            ) as response:
+                if response.status_code != 200:
+                    logger.warning("Streaming TTS error response %s: %.500r", response.status_code, await response.aread())
+                    return
 
-                    chunk_count = 0
-                    async for chunk in response.aiter_bytes(chunk_size=1024):
-                        if chunk:
-                            chunk_count += 1
-                            print(f"   ✓ Streaming chunk {chunk_count}: {len(chunk)} bytes")
-                            yield chunk
+                async for chunk in response.aiter_bytes(chunk_size=4096):
+                    if chunk:
+                        yield chunk
 
         except httpx.HTTPStatusError as e:
-            print(f"   ✗ HTTP Error generating voice:")
-            print(f"      Status: {e.response.status_code}")
-            import traceback
-            traceback.print_exc()
+            logger.error("HTTP error generating voice: %s", e.response.status_code, exc_info=True)
         except httpx.TimeoutException as e:
-            print(f"   ✗ Timeout error generating voice: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error("Timeout error generating voice: %s", e, exc_info=True)
         except Exception as e:
-            print(f"   ✗ Unexpected error generating voice:")
-            print(f"      Type: {type(e).__name__}")
-            print(f"      Message: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.error("Unexpected error generating voice: %s: %s", type(e).__name__, e, exc_info=True)
 
 
 # Initialize service
@@ -1,10 +1,15 @@
 """
 Kimi K2.5 service via Featherless AI for clinical reasoning.
 """
+import logging
 import httpx
-from typing import List, Dict, Any, Optional
+import orjson
+from typing import AsyncIterator, List, Dict, Any, Optional
 from app.config import settings
+from app.utils.http_client import get_http_client
+from app.utils.prompts import get_patient_system_prompt
 
+logger = logging.getLogger(__name__)
 
 class KimiService:
     """Service for Kimi K2.5 model via Featherless AI API."""
@@ -18,6 +23,28 @@ class KimiService:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+
+    def _build_prompt(
+        self,
+        system_prompt: str,
+        user_message: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> str:
+        """Build the completions-format prompt (Featherless uses completions, not chat)."""
+        prompt_parts = [f"System: {system_prompt}\n"]
+        
+        # Add conversation history if provided
+        if conversation_history:
+            for msg in conversation_history:
+                role = msg.get("role", "user").capitalize()
+                content = msg.get("content", "")
+                prompt_parts.append(f"{role}: {content}\n")
+        
+        # Add current user message
+        prompt_parts.append(f"User: {user_message}\n")
+        prompt_parts.append("Assistant: ")
+        
+        return "\n".join(prompt_parts)
     
     async def query_k2_thinking(
         self,
@@ -50,20 +77,7 @@ class KimiService:
         """
         try:
             # Build full prompt from messages (Featherless uses completions format)
-            prompt_parts = [f"System: {system_prompt}\n"]
-            
-            # Add conversation history if provided
-            if conversation_history:
-                for msg in conversation_history:
-                    role = msg.get("role", "user").capitalize()
-                    content = msg.get("content", "")
-                    prompt_parts.append(f"{role}: {content}\n")
-            
-            # Add current user message
-            prompt_parts.append(f"User: {user_message}\n")
-            prompt_parts.append("Assistant: ")
-            
-            full_prompt = "\n".join(prompt_parts)
+            full_prompt = self._build_prompt(system_prompt, user_message, conversation_history)
             
             # Prepare request payload for Featherless completions endpoint
             payload = {
@@ -75,42 +89,101 @@ class KimiService:
             }
             
             # Make API request to completions endpoint
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{self.api_base}/completions",
-                    headers=self.headers,
-                    json=payload
-                )
-                response.raise_for_status()
+            client = get_http_client()
+            response = await client.post(
+                f"{self.api_base}/completions",
+                headers=self.headers,
+                json=payload,
+                timeout=60.0
+            )
+            response.raise_for_status()
                 
-                result = response.json()
+            result = response.json()
                 
-                # Extract response from completions format
-                if "choices" not in result or len(result["choices"]) == 0:
-                    raise Exception("No response choices in API result")
+            # Extract response from completions format
+            if "choices" not in result or len(result["choices"]) == 0:
+                raise Exception("No response choices in API result")
                 
-                choice = result["choices"][0]
-                response_text = choice.get("text", "").strip()
+            choice = result["choices"][0]
+            response_text = choice.get("text", "").strip()
                 
-                # Extract usage info
-                usage = result.get("usage", {})
+            # Extract usage info
+            usage = result.get("usage", {})
                 
-                return {
-                    "response": response_text,
-                    "thinking_process": "",  # Completions API doesn't return thinking
-                    "usage": usage
-                }
+            return {
+                "response": response_text,
+                "thinking_process": "",  # Completions API doesn't return thinking
+                "usage": usage
+            }
                 
         except httpx.HTTPStatusError as e:
-            print(f"Featherless API HTTP error: {e.response.status_code} - {e.response.text}")
+            logger.error("Featherless API HTTP error: %s - %s", e.response.status_code, e.response.text)
             raise Exception(f"Featherless API request failed: {e.response.status_code}")
         except httpx.RequestError as e:
-            print(f"Featherless API request error: {str(e)}")
+            logger.error("Featherless API request error: %s", e)
             raise Exception(f"Failed to connect to Featherless API: {str(e)}")
         except Exception as e:
-            print(f"Kimi service error: {str(e)}")
+            logger.error("Kimi service error: %s", e)
             raise Exception(f"Kimi reasoning failed: {str(e)}")
     
+    async def stream_k2_thinking(
+        self,
+        system_prompt: str,
+        user_message: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000
+    ) -> AsyncIterator[str]:
+        """
+        Stream Kimi K2.5 completion text via Featherless as it is generated.
+        
+        Same arguments as query_k2_thinking; yields text deltas from the
+        server-sent event stream instead of returning the full response.
+        
+        Raises:
+            Exception: If API request fails
+        """
+        payload = {
+            "model": self.model,
+            "prompt": self._build_prompt(system_prompt, user_message, conversation_history),
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stop": ["\nUser:", "\nSystem:"],
+            "stream": True
+        }
+        
+        try:
+            client = get_http_client()
+            async with client.stream(
+                "POST",
+                f"{self.api_base}/completions",
+                headers=self.headers,
+                json=payload,
+                timeout=60.0
+            ) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                response.raise_for_status()
+                    
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = orjson.loads(data).get("choices")
+                    if choices:
+                        text = choices[0].get("text")
+                        if text:
+                            yield text
+                                
+        except httpx.HTTPStatusError as e:
+            logger.error("Featherless API HTTP error: %s - %s", e.response.status_code, e.response.text)
+            raise Exception(f"Featherless API request failed: {e.response.status_code}")
+        except httpx.RequestError as e:
+            logger.error("Featherless API request error: %s", e)
+            raise Exception(f"Failed to connect to Featherless API: {str(e)}")
+    
     async def generate_patient_response(
         self,
         student_input: str,
@@ -130,8 +203,6 @@ class KimiService:
         Returns:
             Dictionary with patient response and metadata
         """
-        from app.utils.prompts import get_patient_system_prompt
-
         # Generate patient persona system prompt
         system_prompt = get_patient_system_prompt(case_data, difficulty)
 
@@ -172,8 +243,6 @@ class KimiService:
         Returns:
             Dictionary with tutor response and reasoning metadata
         """
-        from app.utils.prompts import get_patient_system_prompt
-
         # Use patient prompt for persona-based responses
         system_prompt = get_patient_system_prompt(
             case_context,
@@ -201,6 +270,31 @@ class KimiService:
             "reasoning_metadata": reasoning_metadata
         }
     
+    def stream_clinical_reasoning(
+        self,
+        student_input: str,
+        case_context: Dict[str, Any],
+        conversation_history: List[Dict[str, str]]
+    ) -> AsyncIterator[str]:
+        """
+        Streaming counterpart of analyze_clinical_reasoning.
+        
+        Returns:
+            Async iterator of raw response text deltas
+        """
+        system_prompt = get_patient_system_prompt(
+            case_context,
+            difficulty=case_context.get("difficulty", "medium")
+        )
+
+        return self.stream_k2_thinking(
+            system_prompt=system_prompt,
+            user_message=student_input,
+            conversation_history=conversation_history,
+            temperature=0.85,
+            max_tokens=1000
+        )
+    
     async def complete(
         self,
         messages: List[Dict[str, str]],
@@ -237,27 +331,28 @@ class KimiService:
                 "max_tokens": max_tokens,
             }
 
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{self.api_base}/completions",
-                    headers=self.headers,
-                    json=payload
-                )
-                response.raise_for_status()
+            client = get_http_client()
+            response = await client.post(
+                f"{self.api_base}/completions",
+                headers=self.headers,
+                json=payload,
+                timeout=60.0
+            )
+            response.raise_for_status()
 
-                result = response.json()
-                if "choices" not in result or len(result["choices"]) == 0:
-                    raise Exception("No response choices in API result")
+            result = response.json()
+            if "choices" not in result or len(result["choices"]) == 0:
+                raise Exception("No response choices in API result")
 
-                response_text = result["choices"][0].get("text", "").strip()
+            response_text = result["choices"][0].get("text", "").strip()
 
-                return {
-                    "content": response_text,
-                    "usage": result.get("usage", {})
-                }
+            return {
+                "content": response_text,
+                "usage": result.get("usage", {})
+            }
 
         except Exception as e:
-            print(f"Kimi complete error: {str(e)}")
+            logger.error("Kimi complete error: %s", e)
             raise
 
     def _format_history(self, conversation_history: List[Dict[str, str]]) -> str:
@@ -2,10 +2,17 @@
 Reasoning engine that orchestrates Socratic clinical reasoning sessions.
 """
 import logging
-from typing import Dict, Any, List, Optional
-from uuid import UUID
+import re
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+from uuid import UUID, uuid4
+from app.config import settings
+from app.data.demo_cases import get_demo_case
+from app.models.case import Case
+from app.models.interaction import Interaction
+from app.services.elevenlabs_service import elevenlabs_service
 from app.services.kimi_service import kimi_service
 from app.services.supabase_service import supabase_service
+from app.utils.text import strip_think
 from app.utils.prompt_templates import (
     format_system_prompt,
     format_interaction_prompt,
@@ -14,6 +21,62 @@ from app.utils.prompt_templates import (
 
 logger = logging.getLogger(__name__)
 
+# Patient-response extraction patterns (shared by the batch and streaming paths)
+_FILLER_RES = (
+    re.compile(r'^(?:I\'m thinking|I\'m thinking\.\.\.|Hmm|Hmm\.|Um\.|Let me think|Thinking\.|Well\.|So\.|Okay\.|Alright\.?)\s*', re.IGNORECASE),
+    re.compile(r'^(?:The patient would say|As a patient|The patient says|I would say)\s*', re.IGNORECASE),
+)
+# Anything that indicates analysis/meta-commentary; the response is cut at the first match
+_STOP_RE = re.compile(
+    r'\n\n'  # Double newline = likely new section
+    r'|(?:The (question|user|patient|doctor)|Analyzing|Based on|According to)'
+    r'|(?:This (seems|means|indicates)|That (means|suggests))'
+    r'|(?:As a patient|The patient (would|is|might))'
+    r'|(?:In response to|Response:|Draft:|Note:)'
+    r'|(?:\*\*|###|---)'  # Markdown markers
+    r'|(?:seems like|might be|could be)'
+    r'|(?:Clinical|Medical|Patient Information|Chief Complaint)',
+    re.IGNORECASE
+)
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+MAX_PATIENT_SENTENCES = 6
+# Longest text the filler patterns can consume; streaming waits for this much
+# so a half-received "The patient would say" isn't mistaken for a cutoff marker
+_FILLER_LOOKAHEAD = 48
+_NON_DIALOGUE_MARKERS = ('year-old', 'presents', 'chief complaint', 'differential')
+_FILLER_SENTENCES = frozenset(['hmm', 'um', 'yeah', 'well', 'so', 'okay', 'alright', 'i\'m not sure', 'i don\'t know'])
+FALLBACK_PATIENT_RESPONSE = "I'm experiencing the symptoms I mentioned - it's been going on for a few days now."
+
+# Greeting helpers: demographic prefix ("22-year-old presents with") and duration phrases ("for 3 days")
+_DEMOGRAPHIC_PREFIX_RE = re.compile(r'^.*?(?:presents with|complains of|reports|with)\s+')
+_DURATION_RE = re.compile(r'\s+(?:for|over|during)\s+\d+.*?(?=\.|$)')
+
+
+def extract_symptoms(chief_complaint: str) -> str:
+    """Reduce a chief complaint to a first-person-friendly symptom phrase."""
+    symptoms = chief_complaint.lower()
+    symptoms = _DEMOGRAPHIC_PREFIX_RE.sub('', symptoms)
+    symptoms = _DURATION_RE.sub('', symptoms)
+    return symptoms.rstrip('.')
+
+
+def _strip_filler(text: str) -> str:
+    """Remove leading filler like "Hmm." or "The patient would say"."""
+    for pattern in _FILLER_RES:
+        text = pattern.sub('', text)
+    return text
+
+
+def _is_patient_sentence(sent: str) -> bool:
+    """Whether a (stripped) sentence is meaningful patient dialogue."""
+    if not sent or len(sent) < 5:
+        return False
+    lowered = sent.lower()
+    # Skip if it's clearly not patient dialogue, or obvious filler
+    if any(marker in lowered for marker in _NON_DIALOGUE_MARKERS):
+        return False
+    return lowered not in _FILLER_SENTENCES
+
 
 class ReasoningEngine:
     """
@@ -39,15 +102,20 @@ class ReasoningEngine:
         if not case:
             raise Exception("Case not found")
         
+        return self.greeting_for_case(case)
+
+    def greeting_for_case(self, case: Case) -> str:
+        """
+        Pick the static greeting template for a case.
+        
+        Args:
+            case: Clinical case
+            
+        Returns:
+            Initial greeting text (deterministic per case)
+        """
         # Extract just the symptoms from clinical description
-        # Remove clinical prefixes like "22-year-old presents with"
-        import re
-        symptoms = case.chief_complaint.lower()
-        # Remove age/demographic info (e.g., "22-year-old college student presents with")
-        symptoms = re.sub(r'^.*?(?:presents with|complains of|reports|with)\s+', '', symptoms)
-        # Clean up "for X days" type phrases
-        symptoms = re.sub(r'\s+(?:for|over|during)\s+\d+.*?(?=\.|$)', '', symptoms)
-        symptoms = symptoms.rstrip('.')
+        symptoms = extract_symptoms(case.chief_complaint)
 
         # Use natural, conversational greetings in first person
         greeting_templates = [
@@ -59,10 +127,42 @@ class ReasoningEngine:
         ]
         
         # Select template based on case_id for consistency (same case = same greeting style)
-        template_index = int(str(case_id).split('-')[0], 16) % len(greeting_templates)
+        template_index = int(str(case.id).split('-')[0], 16) % len(greeting_templates)
         greeting = greeting_templates[template_index]
         
         return greeting
+
+    async def prepare_case_greeting(self, case: Case) -> None:
+        """
+        Precompute a case's greeting text and audio and store them on the case,
+        so starting a session doesn't wait on greeting generation or TTS.
+        
+        Meant to run as a background task after a case is created; on failure
+        start_session simply falls back to generating the greeting on demand.
+        
+        Args:
+            case: Newly created clinical case
+        """
+        try:
+            greeting = self.greeting_for_case(case)
+            greeting_audio_url = None
+
+            audio_bytes = await elevenlabs_service.generate_voice(
+                text=greeting,
+                voice_id=settings.elevenlabs_voice_id
+            )
+            if audio_bytes:
+                # Stored under the case's folder in the audio bucket
+                greeting_audio_url = await supabase_service.upload_audio(
+                    file_data=audio_bytes,
+                    session_id=case.id,
+                    filename=f"greeting_{uuid4().hex}.mp3",
+                    content_type="audio/mpeg"
+                ) or None
+
+            await supabase_service.update_case_greeting(case.id, greeting, greeting_audio_url)
+        except Exception as e:
+            logger.warning("Failed to precompute greeting for case %s: %s", case.id, e)
     
     async def generate_response(
         self,
@@ -84,53 +184,27 @@ class ReasoningEngine:
             - reasoning_metadata: Metadata about the reasoning process
         """
         # Check if this is a demo session (in-memory, no database)
-        is_demo = str(session_id) == "00000000-0000-0000-0000-000000000000"
+        is_demo = session_id.int == 0
 
         if is_demo:
             # For demo sessions, load actual case data
-            print(f"📌 DEMO SESSION DEBUG: case_id={case_id}, type={type(case_id)}")
-            logger.info("📌 Demo session detected - loading demo case data")
-            from app.data.demo_cases import get_demo_case
+            logger.debug("Demo session detected - loading demo case %s", case_id)
 
             try:
-                # Get the demo case data (case_id should be like "case-1")
-                # If case_id is not provided, default to case-1
-                used_case_id = case_id or "case-1"
-                print(f"📌 DEMO SESSION DEBUG: Loading case {used_case_id}")
-                demo_case_data = get_demo_case(used_case_id)
-
-                if not demo_case_data:
-                    logger.warning(f"Demo case {case_id} not found, using generic fallback")
-                    demo_case_data = {
-                        "clinical_scenario": "Patient presenting with acute symptoms",
-                        "chief_complaint": "Patient-reported chief complaint",
-                        "differential_diagnoses": [],
-                        "red_flags": [],
-                    }
-
-                case_context = {
-                    "clinical_scenario": demo_case_data["clinical_scenario"],
-                    "chief_complaint": demo_case_data["chief_complaint"],
-                    "differential_diagnoses": demo_case_data.get("differential_diagnoses", []),
-                    "red_flags": demo_case_data.get("red_flags", []),
-                }
+                case_context = self._demo_case_context(case_id)
 
-                print(f"✓ Case context prepared: {case_context['chief_complaint'][:50]}...")
-                logger.info(f"Using demo case context: {case_context['chief_complaint'][:50]}...")
+                logger.debug("Using demo case context: %.50s", case_context['chief_complaint'])
 
                 # Use Kimi to analyze and respond with actual case context
-                print(f"🔄 Calling K2 with case context...")
                 result = await kimi_service.analyze_clinical_reasoning(
                     student_input=student_input,
                     case_context=case_context,
                     conversation_history=[]
                 )
-                print(f"✓ K2 response received")
-
-                logger.info(f"Result type: {type(result)}, Result: {result}")
+                logger.debug("K2 result: %r", result)
 
                 if not isinstance(result, dict):
-                    logger.error(f"Expected dict from kimi_service, got {type(result)}")
+                    logger.error("Expected dict from kimi_service, got %s", type(result))
                     # Fallback for demo
                     return {
                         "tutor_response": "I understand. Can you tell me more about your symptoms?",
@@ -143,10 +217,7 @@ class ReasoningEngine:
                     "reasoning_metadata": result.get("reasoning_metadata", {})
                 }
             except Exception as e:
-                logger.error(f"Error in demo session response generation: {str(e)}")
-                print(f"❌ DEMO SESSION ERROR: {type(e).__name__}: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                logger.error("Error in demo session response generation: %s: %s", type(e).__name__, e, exc_info=True)
                 # Fallback for demo
                 return {
                     "tutor_response": "I'm listening. Can you describe what's happening?",
@@ -154,27 +225,7 @@ class ReasoningEngine:
                 }
 
         # Load session and case context from database (real cases only)
-        session = await supabase_service.get_session(session_id)
-        if not session:
-            raise Exception("Session not found")
-
-        case = await supabase_service.get_case(session.case_id)
-        if not case:
-            raise Exception("Case not found")
-        
-        # Load conversation history
-        interactions = await supabase_service.get_session_history(session_id)
-        
-        # Format conversation history for Kimi
-        conversation_history = self._build_conversation_history(interactions)
-        
-        # Prepare case context
-        case_context = {
-            "clinical_scenario": case.clinical_scenario,
-            "chief_complaint": case.chief_complaint,
-            "differential_diagnoses": case.differential_diagnoses,
-            "red_flags": case.red_flags
-        }
+        case, interactions, case_context, conversation_history = await self._load_session_context(session_id)
         
         # Use Kimi to analyze and respond
         result = await kimi_service.analyze_clinical_reasoning(
@@ -201,6 +252,100 @@ class ReasoningEngine:
             "reasoning_metadata": reasoning_metadata
         }
     
+    async def stream_response(
+        self,
+        session_id: UUID,
+        student_input: str,
+        case_id: str = None  # Optional: explicitly pass case_id for demo sessions
+    ) -> Tuple[AsyncIterator[str], Dict[str, Any]]:
+        """
+        Streaming variant of generate_response.
+
+        Context is loaded up front, so lookup failures raise before anything
+        is sent; the reply itself is produced sentence by sentence while K2
+        is still generating.
+
+        Args:
+            session_id: Session UUID
+            student_input: Student's question or response
+            case_id: Optional case ID (used for demo sessions)
+
+        Returns:
+            Tuple of (async iterator of patient sentences, reasoning metadata)
+        """
+        reasoning_metadata = {"thinking_process": "", "tokens_used": {}}
+
+        if session_id.int == 0:  # Demo session (in-memory, no database)
+            case_context = self._demo_case_context(case_id)
+            conversation_history = []
+        else:
+            case, interactions, case_context, conversation_history = await self._load_session_context(session_id)
+            reasoning_metadata.update(
+                self._analyze_student_reasoning(
+                    student_input=student_input,
+                    case=case,
+                    previous_interactions=interactions
+                )
+            )
+
+        chunks = kimi_service.stream_clinical_reasoning(
+            student_input=student_input,
+            case_context=case_context,
+            conversation_history=conversation_history
+        )
+        return self._stream_patient_sentences(chunks), reasoning_metadata
+
+    def _demo_case_context(self, case_id: Optional[str]) -> Dict[str, Any]:
+        """Build case context for a demo session from the in-memory demo cases."""
+        # case_id should be like "case-1"; default to case-1 if not provided
+        demo_case_data = get_demo_case(case_id or "case-1")
+
+        if not demo_case_data:
+            logger.warning("Demo case %s not found, using generic fallback", case_id)
+            demo_case_data = {
+                "clinical_scenario": "Patient presenting with acute symptoms",
+                "chief_complaint": "Patient-reported chief complaint",
+                "differential_diagnoses": [],
+                "red_flags": [],
+            }
+
+        return {
+            "clinical_scenario": demo_case_data["clinical_scenario"],
+            "chief_complaint": demo_case_data["chief_complaint"],
+            "differential_diagnoses": demo_case_data.get("differential_diagnoses", []),
+            "red_flags": demo_case_data.get("red_flags", []),
+        }
+
+    async def _load_session_context(
+        self,
+        session_id: UUID
+    ) -> Tuple[Any, List[Any], Dict[str, Any], List[Dict[str, str]]]:
+        """
+        Load a real session's case and history from the database.
+
+        Returns:
+            Tuple of (case, interactions, case_context, conversation_history)
+        """
+        session = await supabase_service.get_session(session_id)
+        if not session:
+            raise Exception("Session not found")
+
+        case = await supabase_service.get_case(session.case_id)
+        if not case:
+            raise Exception("Case not found")
+        
+        # Load conversation history and format it for Kimi
+        interactions = await supabase_service.get_session_history(session_id)
+        conversation_history = self._build_conversation_history(interactions)
+        
+        case_context = {
+            "clinical_scenario": case.clinical_scenario,
+            "chief_complaint": case.chief_complaint,
+            "differential_diagnoses": case.differential_diagnoses,
+            "red_flags": case.red_flags
+        }
+        return case, interactions, case_context, conversation_history
+
     def _build_conversation_history(
         self,
         interactions: List[Any]
@@ -272,7 +417,8 @@ class ReasoningEngine:
     async def evaluate_session(
         self,
         session_id: UUID,
-        case_id: str = None
+        case_id: str = None,
+        session_bundle: Optional[Tuple[Any, Optional[Case], List[Dict[str, Any]]]] = None
     ) -> Dict[str, Any]:
         """
         Evaluate a student's overall performance in a session.
@@ -280,19 +426,20 @@ class ReasoningEngine:
         Args:
             session_id: Session UUID
             case_id: Optional case ID (required for demo sessions)
+            session_bundle: Result of get_session_bundle(session_id, interaction_columns="*")
+                if the caller already fetched it; otherwise it's loaded here
 
         Returns:
             Evaluation with scores, feedback, and summary
         """
         # Check if this is a demo session
-        is_demo_session = str(session_id) == "00000000-0000-0000-0000-000000000000"
+        is_demo_session = session_id.int == 0
 
         if is_demo_session:
             # For demo sessions, load case from demo_cases
             if not case_id:
                 raise Exception("case_id required for demo session evaluation")
 
-            from app.data.demo_cases import get_demo_case
             demo_case_data = get_demo_case(case_id)
             if not demo_case_data:
                 raise Exception(f"Demo case {case_id} not found")
@@ -312,21 +459,19 @@ class ReasoningEngine:
 
             # For demo sessions, interactions aren't stored in database
             # Return a basic evaluation without real interaction data
-            print(f"📌 Evaluating demo session for {case_id}")
+            logger.debug("Evaluating demo session for %s", case_id)
         else:
-            # For real sessions, load from database
-            session = await supabase_service.get_session(session_id)
-            if not session:
+            # For real sessions, load session, case and interactions in one query
+            bundle = session_bundle or await supabase_service.get_session_bundle(session_id, interaction_columns="*")
+            if not bundle:
                 raise Exception("Session not found")
 
-            case = await supabase_service.get_case(session.case_id)
-            interactions = await supabase_service.get_session_history(session_id)
+            _, case, interaction_rows = bundle
+            interactions = [Interaction(**row) for row in interaction_rows]
 
-        # Get interactions - for demo sessions, this will be empty but evaluation still works
-        if not is_demo_session:
-            interactions = await supabase_service.get_session_history(session_id)
-        else:
-            interactions = []  # No interactions stored for demo sessions
+        # Demo sessions have no stored interactions, but evaluation still works
+        if is_demo_session:
+            interactions = []
 
         # Collect all red flags and diagnoses mentioned
         all_red_flags = set()
@@ -453,68 +598,90 @@ class ReasoningEngine:
         Stop at ANY meta-commentary or analysis.
         Filter out filler responses like "I'm thinking" or "Hmm".
         """
-        import re
-
-        # Remove everything after <think> tags
-        response = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL)
-        response = response.strip()
-
-        # Remove common filler prefixes that don't add value
-        filler_patterns = [
-            r'^(?:I\'m thinking|I\'m thinking\.\.\.|Hmm|Hmm\.|Um\.|Let me think|Thinking\.|Well\.|So\.|Okay\.|Alright\.?)\s*',
-            r'^(?:The patient would say|As a patient|The patient says|I would say)\s*',
-        ]
-
-        for pattern in filler_patterns:
-            response = re.sub(pattern, '', response, flags=re.IGNORECASE)
-
-        # List of all patterns that indicate analysis/meta-commentary (stop here)
-        stop_patterns = [
-            r'\n\n',  # Double newline = likely new section
-            r'(?:The (question|user|patient|doctor)|Analyzing|Based on|According to)',
-            r'(?:This (seems|means|indicates)|That (means|suggests))',
-            r'(?:As a patient|The patient (would|is|might))',
-            r'(?:In response to|Response:|Draft:|Note:)',
-            r'(?:\*\*|###|---)',  # Markdown markers
-            r'(?:seems like|might be|could be)',
-            r'(?:Clinical|Medical|Patient Information|Chief Complaint)',
-        ]
+        # Remove everything in <think> tags, then leading filler
+        response = _strip_filler(strip_think(response).strip())
 
-        # Find where to cut off
-        cutoff_pos = len(response)
-        for pattern in stop_patterns:
-            match = re.search(pattern, response, re.IGNORECASE)
-            if match:
-                cutoff_pos = min(cutoff_pos, match.start())
+        # Take only valid patient dialogue (cut at the first analysis marker)
+        cutoff = _STOP_RE.search(response)
+        patient_text = (response[:cutoff.start()] if cutoff else response).strip()
 
-        # Take only valid patient dialogue
-        patient_text = response[:cutoff_pos].strip()
-
-        # If too long, take only first 4-6 sentences (allow more detailed patient responses)
-        sentences = re.split(r'(?<=[.!?])\s+', patient_text)
-
-        # Keep only first 6 meaningful sentences for more detailed responses
+        # Keep only the first few meaningful sentences
+        sentences = _SENTENCE_SPLIT_RE.split(patient_text)
         result = []
-        for sent in sentences[:6]:
+        for sent in sentences[:MAX_PATIENT_SENTENCES]:
             sent = sent.strip()
-            if not sent or len(sent) < 5:  # Increased minimum from 3 to 5 chars
-                continue
-            # Skip if it's clearly not patient dialogue
-            if any(marker in sent.lower() for marker in ['year-old', 'presents', 'chief complaint', 'differential']):
-                continue
-            # Skip obvious filler
-            if sent.lower() in ['hmm', 'um', 'yeah', 'well', 'so', 'okay', 'alright', 'i\'m not sure', 'i don\'t know']:
-                continue
-            result.append(sent)
+            if _is_patient_sentence(sent):
+                result.append(sent)
 
         final_response = ' '.join(result).strip()
 
-        # If response is empty or just filler, try to extract something useful
+        # If response is empty or just filler, fall back to something useful
         if not final_response or len(final_response) < 10:
-            final_response = "I'm experiencing the symptoms I mentioned - it's been going on for a few days now."
+            final_response = FALLBACK_PATIENT_RESPONSE
 
         return final_response
 
+    async def _stream_patient_sentences(self, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+        """
+        Incremental _extract_patient_response over a K2 token stream.
+
+        Yields each patient sentence as soon as it is complete, applying the
+        same think-block, filler, cutoff and sentence rules, and stops reading
+        from K2 once a cutoff marker or the sentence limit is reached.
+        """
+        raw = ""
+        consumed = 0  # sentences already handled
+        pending = ""  # held until it is long enough to count as a real response
+        yielded = False
+        finished = False
+
+        try:
+            while not finished:
+                try:
+                    raw += await chunks.__anext__()
+                except StopAsyncIteration:
+                    finished = True
+
+                # Drop closed <think> blocks and hold back an unclosed one until it closes
+                text = strip_think(raw)
+                open_think = -1 if finished else text.find('<think>')
+                if open_think >= 0:
+                    text = text[:open_think]
+
+                text = text.lstrip()
+                if not finished and len(text) < _FILLER_LOOKAHEAD:
+                    continue
+                text = _strip_filler(text)
+                cutoff = _STOP_RE.search(text)
+                if cutoff:
+                    text = text[:cutoff.start()]
+                    finished = True
+
+                sentences = _SENTENCE_SPLIT_RE.split(text.strip())
+                # The last piece may still be growing unless the response is over
+                complete = sentences if finished else sentences[:-1]
+
+                for sent in complete[consumed:MAX_PATIENT_SENTENCES]:
+                    sent = sent.strip()
+                    if not _is_patient_sentence(sent):
+                        continue
+                    if yielded:
+                        yield sent
+                    else:
+                        pending = f"{pending} {sent}" if pending else sent
+                        if len(pending) >= 10:
+                            yielded = True
+                            yield pending
+                consumed = len(complete)
+                if consumed >= MAX_PATIENT_SENTENCES:
+                    finished = True
+        finally:
+            # Stop generating (and close the HTTP stream) once we have what we need
+            await chunks.aclose()
+
+        if not yielded:
+            yield FALLBACK_PATIENT_RESPONSE
+
 
 # Global reasoning engine instance
 reasoning_engine = ReasoningEngine()
@@ -1,25 +1,56 @@
 """
 Supabase service for database operations and file storage.
 """
+import asyncio
+import threading
+import time
+from postgrest.exceptions import APIError
 from supabase import create_client, Client
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from uuid import UUID
 from datetime import datetime
 from app.config import settings
-from app.models.case import Case, CaseCreate
+from app.models.case import Case, CaseCreate, CasePublic
 from app.models.session import Session, SessionCreate, SessionStatus
 from app.models.interaction import Interaction
 
+# Session rows rarely change mid-conversation; cache lookups briefly so each
+# interaction turn doesn't pay a database round-trip for the same record
+SESSION_CACHE_TTL = 30.0
+SESSION_CACHE_MAX_ENTRIES = 1024
+
+# interaction_number is taken as last + 1 and inserted under
+# UNIQUE(session_id, interaction_number); a concurrent save for the same session
+# makes the insert fail, so the number is re-read and the insert retried
+SAVE_INTERACTION_MAX_ATTEMPTS = 5
+
+# Postgres unique_violation error code, as reported by PostgREST
+_UNIQUE_VIOLATION = "23505"
+
+# Interaction fields included in the session detail response
+SESSION_BUNDLE_INTERACTION_COLUMNS = "interaction_number,student_input,tutor_response,timestamp,reasoning_metadata"
+
 
 class SupabaseService:
     """Service for Supabase database and storage operations."""
     
     def __init__(self):
-        """Initialize Supabase client."""
-        self.client: Client = create_client(
-            settings.supabase_url,
-            settings.supabase_key
-        )
+        """Initialize service; the Supabase client is created on first use."""
+        self._client: Optional[Client] = None
+        self._client_lock = threading.Lock()
+        self._session_cache: Dict[int, Tuple[float, Session]] = {}
+
+    @property
+    def client(self) -> Client:
+        """Lazily create the Supabase client so importing the module stays cheap."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = create_client(
+                        settings.supabase_url,
+                        settings.supabase_key
+                    )
+        return self._client
     
     # ========== Case Operations ==========
     
@@ -59,7 +90,9 @@ class SupabaseService:
             Case object or None if not found
         """
         try:
-            response = self.client.table("cases").select("*").eq("id", str(case_id)).execute()
+            response = await asyncio.to_thread(
+                self.client.table("cases").select("*").eq("id", str(case_id)).execute
+            )
 
             if response.data and len(response.data) > 0:
                 case_data = self._convert_case_data(response.data[0])
@@ -81,12 +114,34 @@ class SupabaseService:
             List of Case objects
         """
         try:
-            response = self.client.table("cases").select("*").limit(limit).execute()
+            response = await asyncio.to_thread(self.client.table("cases").select("*").limit(limit).execute)
             return [Case(**self._convert_case_data(case_data)) for case_data in response.data]
 
         except Exception as e:
             print(f"Error listing cases: {str(e)}")
             raise
+
+    async def list_case_summaries(self, limit: int = 50) -> List[CasePublic]:
+        """
+        List public case summaries, selecting only the columns they need.
+
+        Args:
+            limit: Maximum number of cases to return
+
+        Returns:
+            List of CasePublic objects
+        """
+        try:
+            query = self.client.table("cases").select(
+                "id,title,chief_complaint,learning_objectives"
+            ).limit(limit)
+            response = await asyncio.to_thread(query.execute)
+            # Rows come straight from our own table, so skip re-validation
+            return [CasePublic.model_construct(**case_data) for case_data in response.data]
+
+        except Exception as e:
+            print(f"Error listing case summaries: {str(e)}")
+            raise
     
     async def create_case(self, case_data: CaseCreate) -> Case:
         """
@@ -99,7 +154,7 @@ class SupabaseService:
             Created Case object
         """
         try:
-            response = self.client.table("cases").insert(case_data.model_dump()).execute()
+            response = await asyncio.to_thread(self.client.table("cases").insert(case_data.model_dump()).execute)
             
             if response.data and len(response.data) > 0:
                 return Case(**response.data[0])
@@ -108,8 +163,60 @@ class SupabaseService:
         except Exception as e:
             print(f"Error creating case: {str(e)}")
             raise
+
+    async def create_cases_bulk(self, cases: List[CaseCreate]) -> List[Case]:
+        """
+        Create several clinical cases in a single insert.
+        
+        Args:
+            cases: Case creation data
+            
+        Returns:
+            Created Case objects, in the same order as the input
+        """
+        if not cases:
+            return []
+
+        try:
+            payload = [case_data.model_dump() for case_data in cases]
+            response = await asyncio.to_thread(self.client.table("cases").insert(payload).execute)
+            
+            if response.data and len(response.data) == len(cases):
+                return [Case(**row) for row in response.data]
+            raise Exception("Failed to create cases")
+            
+        except Exception as e:
+            print(f"Error creating cases: {str(e)}")
+            raise
+
+    async def update_case_greeting(self, case_id: UUID, greeting_text: str, greeting_audio_url: Optional[str]) -> None:
+        """
+        Store a case's precomputed session greeting.
+        
+        Args:
+            case_id: Case UUID
+            greeting_text: Greeting the patient opens each session with
+            greeting_audio_url: Public URL of the synthesized greeting, if any
+        """
+        try:
+            query = self.client.table("cases").update({
+                "greeting_text": greeting_text,
+                "greeting_audio_url": greeting_audio_url
+            }).eq("id", str(case_id))
+            await asyncio.to_thread(query.execute)
+            
+        except Exception as e:
+            print(f"Error updating case greeting: {str(e)}")
+            raise
     
     # ========== Session Operations ==========
+
+    def _cache_session(self, session: Session) -> None:
+        """Store a session in the short-lived lookup cache."""
+        if len(self._session_cache) >= SESSION_CACHE_MAX_ENTRIES:
+            # Drop the oldest entry (dicts keep insertion order)
+            self._session_cache.pop(next(iter(self._session_cache)))
+        self._session_cache[session.id.int] = (time.monotonic() + SESSION_CACHE_TTL, session)
     
     async def create_session(self, case_id: UUID, student_id: str, metadata: Optional[Dict[str, Any]] = None) -> Session:
         """
@@ -131,7 +238,8 @@ class SupabaseService:
                 "metadata": metadata or {}
             }
             
-            response = self.client.table("sessions").insert(session_data).execute()
+            # Off the event loop so callers can overlap it with other I/O
+            response = await asyncio.to_thread(self.client.table("sessions").insert(session_data).execute)
             
             if response.data and len(response.data) > 0:
                 return Session(**response.data[0])
@@ -151,11 +259,19 @@ class SupabaseService:
         Returns:
             Session object or None if not found
         """
+        cached = self._session_cache.get(session_id.int)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
         try:
-            response = self.client.table("sessions").select("*").eq("id", str(session_id)).execute()
+            response = await asyncio.to_thread(
+                self.client.table("sessions").select("*").eq("id", str(session_id)).execute
+            )
             
             if response.data and len(response.data) > 0:
-                return Session(**response.data[0])
+                session = Session(**response.data[0])
+                self._cache_session(session)
+                return session
             return None
             
         except Exception as e:
@@ -179,10 +295,17 @@ class SupabaseService:
             if status == SessionStatus.COMPLETED:
                 update_data["completed_at"] = datetime.utcnow().isoformat()
             
-            response = self.client.table("sessions").update(update_data).eq("id", str(session_id)).execute()
+            # Invalidate first so a failed update can't leave a stale status cached
+            self._session_cache.pop(session_id.int, None)
+            # Off the event loop so callers can overlap it with other I/O
+            response = await asyncio.to_thread(
+                self.client.table("sessions").update(update_data).eq("id", str(session_id)).execute
+            )
             
             if response.data and len(response.data) > 0:
-                return Session(**response.data[0])
+                session = Session(**response.data[0])
+                self._cache_session(session)
+                return session
             raise Exception("Failed to update session")
             
         except Exception as e:
@@ -201,14 +324,14 @@ class SupabaseService:
             List of Interaction objects
         """
         try:
-            response = (
+            query = (
                 self.client.table("interactions")
                 .select("*")
                 .eq("session_id", str(session_id))
                 .order("interaction_number", desc=False)
                 .limit(limit)
-                .execute()
             )
+            response = await asyncio.to_thread(query.execute)
             
             return [Interaction(**interaction_data) for interaction_data in response.data]
             
@@ -216,6 +339,58 @@ class SupabaseService:
             print(f"Error fetching session history: {str(e)}")
             raise
     
+    async def get_session_bundle(
+        self,
+        session_id: UUID,
+        limit: int = 50,
+        interaction_columns: str = SESSION_BUNDLE_INTERACTION_COLUMNS
+    ) -> Optional[Tuple[Session, Optional[Case], List[Dict[str, Any]]]]:
+        """
+        Get a session together with its case and interaction history.
+        
+        Uses PostgREST resource embedding over the sessions -> cases and
+        interactions -> sessions foreign keys, so all three come back in a
+        single round-trip instead of three sequential queries.
+        
+        Interactions are returned as raw rows limited to interaction_columns,
+        ready to serialize as-is; pass "*" to get rows that build Interaction models.
+        
+        Args:
+            session_id: Session UUID
+            limit: Maximum number of interactions to return
+            interaction_columns: PostgREST column list for the embedded interactions
+            
+        Returns:
+            (session, case, interaction rows) or None if the session doesn't exist
+        """
+        try:
+            query = (
+                self.client.table("sessions")
+                .select(f"*, cases(*), interactions({interaction_columns})")
+                .eq("id", str(session_id))
+                .order("interaction_number", desc=False, foreign_table="interactions")
+                .limit(limit, foreign_table="interactions")
+            )
+            # Off the event loop so callers can overlap it with other I/O
+            response = await asyncio.to_thread(query.execute)
+            
+            if not response.data:
+                return None
+            
+            row = response.data[0]
+            case_data = row.pop("cases", None)
+            interactions = row.pop("interactions", None) or []
+            
+            # Not cached: this may run alongside update_session_status, and a
+            # snapshot read before the update must not replace the updated session
+            session = Session(**row)
+            case = Case(**self._convert_case_data(case_data)) if case_data else None
+            return session, case, interactions
+            
+        except Exception as e:
+            print(f"Error fetching session bundle: {str(e)}")
+            raise
+    
     # ========== Interaction Operations ==========
     
     async def save_interaction(
@@ -230,6 +405,9 @@ class SupabaseService:
         """
         Save a student-tutor interaction.
         
+        Safe to call concurrently for the same session: interaction numbers
+        that collide are retried rather than failing the save.
+        
         Args:
             session_id: Session UUID
             student_input: Student's input text
@@ -242,19 +420,8 @@ class SupabaseService:
             Created Interaction object
         """
         try:
-            # Get current interaction count
-            count_response = (
-                self.client.table("interactions")
-                .select("interaction_number", count="exact")
-                .eq("session_id", str(session_id))
-                .execute()
-            )
-            
-            interaction_number = len(count_response.data) + 1
-            
             interaction_data = {
                 "session_id": str(session_id),
-                "interaction_number": interaction_number,
                 "student_input": student_input,
                 "tutor_response": tutor_response,
                 "audio_url": audio_url,
@@ -262,14 +429,137 @@ class SupabaseService:
                 "reasoning_metadata": reasoning_metadata or {}
             }
             
-            response = self.client.table("interactions").insert(interaction_data).execute()
+            for attempt in range(SAVE_INTERACTION_MAX_ATTEMPTS):
+                # Number after the session's last interaction
+                last_query = (
+                    self.client.table("interactions")
+                    .select("interaction_number")
+                    .eq("session_id", str(session_id))
+                    .order("interaction_number", desc=True)
+                    .limit(1)
+                )
+                last_response = await asyncio.to_thread(last_query.execute)
+                interaction_data["interaction_number"] = (
+                    last_response.data[0]["interaction_number"] + 1 if last_response.data else 1
+                )
+                
+                try:
+                    response = await asyncio.to_thread(self.client.table("interactions").insert(interaction_data).execute)
+                except APIError as e:
+                    # Another save for this session took the number first; retry with the next one
+                    if e.code == _UNIQUE_VIOLATION and attempt + 1 < SAVE_INTERACTION_MAX_ATTEMPTS:
+                        continue
+                    raise
+                
+                if response.data and len(response.data) > 0:
+                    return Interaction(**response.data[0])
+                raise Exception("Failed to save interaction")
+            
+        except Exception as e:
+            print(f"Error saving interaction: {str(e)}")
+            raise
+    
+    async def update_interaction_audio(self, interaction_id: UUID, response_audio_url: str) -> None:
+        """
+        Attach tutor audio to an already-saved interaction.
+        
+        Args:
+            interaction_id: Interaction UUID
+            response_audio_url: Public URL of the tutor's response audio
+        """
+        try:
+            query = (
+                self.client.table("interactions")
+                .update({"response_audio_url": response_audio_url})
+                .eq("id", str(interaction_id))
+            )
+            await asyncio.to_thread(query.execute)
+            
+        except Exception as e:
+            print(f"Error updating interaction audio: {str(e)}")
+            raise
+    
+    # ========== Generation Job Operations ==========
+    
+    async def create_generation_job(self, condition: str, difficulty: str, requested_count: int) -> Dict[str, Any]:
+        """
+        Record a queued case generation job.
+        
+        Args:
+            condition: Medical condition to generate cases for
+            difficulty: Case difficulty
+            requested_count: Number of cases requested
+            
+        Returns:
+            Created job row
+        """
+        try:
+            response = await asyncio.to_thread(
+                self.client.table("generation_jobs").insert({
+                    "condition": condition,
+                    "difficulty": difficulty,
+                    "requested_count": requested_count
+                }).execute
+            )
             
             if response.data and len(response.data) > 0:
-                return Interaction(**response.data[0])
-            raise Exception("Failed to save interaction")
+                return response.data[0]
+            raise Exception("Failed to create generation job")
             
         except Exception as e:
-            print(f"Error saving interaction: {str(e)}")
+            print(f"Error creating generation job: {str(e)}")
+            raise
+    
+    async def update_generation_job(
+        self,
+        job_id: UUID,
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ) -> None:
+        """
+        Update a generation job's status and outcome.
+        
+        Args:
+            job_id: Job UUID
+            status: New status (queued, running, completed, failed)
+            result: Outcome payload for completed jobs
+            error: Error message for failed jobs
+        """
+        try:
+            query = self.client.table("generation_jobs").update({
+                "status": status,
+                "result": result,
+                "error": error,
+                "updated_at": datetime.utcnow().isoformat()
+            }).eq("id", str(job_id))
+            await asyncio.to_thread(query.execute)
+            
+        except Exception as e:
+            print(f"Error updating generation job: {str(e)}")
+            raise
+    
+    async def get_generation_job(self, job_id: UUID) -> Optional[Dict[str, Any]]:
+        """
+        Get a generation job by ID.
+        
+        Args:
+            job_id: Job UUID
+            
+        Returns:
+            Job row or None if not found
+        """
+        try:
+            response = await asyncio.to_thread(
+                self.client.table("generation_jobs").select("*").eq("id", str(job_id)).execute
+            )
+            
+            if response.data and len(response.data) > 0:
+                return response.data[0]
+            return None
+            
+        except Exception as e:
+            print(f"Error fetching generation job: {str(e)}")
             raise
     
     # ========== Storage Operations ==========
@@ -298,7 +588,8 @@ class SupabaseService:
             file_path = f"{session_id}/{filename}"
             
             # Upload file
-            response = self.client.storage.from_(bucket_name).upload(
+            response = await asyncio.to_thread(
+                self.client.storage.from_(bucket_name).upload,
                 file_path,
                 file_data,
                 {"content-type": content_type}
@@ -0,0 +1,90 @@
+"""
+Small in-process response cache with ETag support for read-mostly endpoints.
+"""
+import asyncio
+import hashlib
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+import orjson
+from fastapi import Request, Response
+
+
+class CachedJSON:
+    """Serialized JSON body plus its ETag."""
+    __slots__ = ('body', 'etag')
+
+    def __init__(self, payload: Any):
+        self.body = orjson.dumps(payload)
+        self.etag = '"' + hashlib.blake2b(self.body, digest_size=16).hexdigest() + '"'
+
+
+class ResponseCache:
+    """
+    TTL cache of serialized JSON responses, bounded to max_entries.
+    Misses for the same key are serialized by a per-key lock so only one
+    caller hits the backend; everyone else reuses the stored body, and
+    misses for other keys don't wait on it.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 128):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, CachedJSON]] = {}
+        # Per-key lock plus the number of callers holding or waiting on it
+        self._locks: Dict[Hashable, list] = {}
+
+    async def get_or_set(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> CachedJSON:
+        """
+        Return the cached response for key, building it with factory on a miss.
+
+        Args:
+            key: Cache key (e.g. endpoint name + query params)
+            factory: Coroutine function returning the JSON-serializable payload
+        """
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+        slot = self._locks.get(key)
+        if slot is None:
+            slot = self._locks[key] = [asyncio.Lock(), 0]
+        slot[1] += 1
+        try:
+            async with slot[0]:
+                entry = self._entries.get(key)
+                if entry and entry[0] > time.monotonic():
+                    return entry[1]
+
+                cached = CachedJSON(await factory())
+                self._store(key, cached)
+                return cached
+        finally:
+            # Drop the lock only once nobody holds or waits on it, so every
+            # caller for a key in flight shares the same lock
+            slot[1] -= 1
+            if not slot[1]:
+                del self._locks[key]
+
+    def _store(self, key: Hashable, cached: CachedJSON):
+        """Insert an entry, dropping the oldest one when full (dicts keep insertion order)."""
+        self._entries.pop(key, None)
+        if len(self._entries) >= self.max_entries:
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (time.monotonic() + self.ttl, cached)
+
+    def clear(self):
+        """Drop all entries (call after writes that change the cached data)."""
+        self._entries.clear()
+
+
+def etag_response(request: Request, cached: CachedJSON) -> Response:
+    """Return 304 if the client already has this body, else the JSON body with its ETag."""
+    headers = {"ETag": cached.etag}
+    if request.headers.get("if-none-match") == cached.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+# Shared cache for the case list endpoints
+case_list_cache = ResponseCache(ttl=30.0)
@@ -0,0 +1,32 @@
+"""
+Shared outbound HTTP client.
+
+Every external API call (ElevenLabs, Featherless, PubMed) goes through one
+pooled httpx.AsyncClient so keep-alive connections are reused across
+requests instead of paying a TCP + TLS handshake per call.
+"""
+from typing import Optional
+
+import httpx
+
+# Callers pass their own per-request timeout; this is only the fallback
+DEFAULT_TIMEOUT = httpx.Timeout(30.0)
+POOL_LIMITS = httpx.Limits(max_keepalive_connections=100, max_connections=200)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, limits=POOL_LIMITS)
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client (call on application shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -2,6 +2,10 @@
 Prompt templates for AI patient personas and medical consultations.
 Adapted from rep-ai sales prompts, now for medical education.
 """
+import re
+
+# Age/gender from chief complaints structured like "45-year-old male"
+_AGE_GENDER_RE = re.compile(r'(\d+)-year-old\s+(male|female|woman|man)', re.IGNORECASE)
 
 
 def get_patient_system_prompt(case_data: dict, difficulty: str = "medium") -> str:
@@ -27,8 +31,7 @@ def get_patient_system_prompt(case_data: dict, difficulty: str = "medium") -> st
     patient_gender = "unknown"
 
     # Try to extract age/gender from chief_complaint if structured like "45-year-old male"
-    import re
-    age_gender_match = re.search(r'(\d+)-year-old\s+(male|female|woman|man)', chief_complaint, re.IGNORECASE)
+    age_gender_match = _AGE_GENDER_RE.search(chief_complaint)
     if age_gender_match:
         patient_age = age_gender_match.group(1)
         patient_gender = age_gender_match.group(2)
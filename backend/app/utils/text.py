@@ -0,0 +1,28 @@
+"""
+Text helpers for cleaning K2 model output.
+"""
+
+
+def strip_think(text: str) -> str:
+    """
+    Remove <think>...</think> reasoning blocks.
+
+    Uses plain str.find scanning: one linear pass with no regex backtracking
+    over multi-KB reasoning traces. An unclosed <think> is left in place.
+    """
+    if '<think>' not in text:
+        return text
+    out = []
+    i = 0
+    while True:
+        j = text.find('<think>', i)
+        if j < 0:
+            out.append(text[i:])
+            break
+        out.append(text[i:j])
+        k = text.find('</think>', j + 7)
+        if k < 0:
+            out.append(text[j:])
+            break
+        i = k + 8
+    return ''.join(out)
@@ -1,8 +1,10 @@
 """
 Input validation utilities.
 """
+import re
 from fastapi import HTTPException, UploadFile
 from typing import Optional
+from uuid import UUID
 
 
 ALLOWED_AUDIO_FORMATS = {
@@ -17,6 +19,40 @@ ALLOWED_AUDIO_FORMATS = {
 
 MAX_AUDIO_SIZE_BYTES = 10 * 1024 * 1024  # 10MB
 
+# Canonical hyphenated UUID, as the API hands out and the frontend sends back
+_UUID_RE = re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+
+# Lengths of the other spellings UUID() accepts: bare hex (32), hyphenated (36),
+# braced (38) and "urn:uuid:"-prefixed (45)
+_UUID_ALT_LENGTHS = frozenset({32, 36, 38, 45})
+
+
+def parse_uuid(value: str) -> Optional[UUID]:
+    """
+    Parse a UUID string.
+    
+    The canonical hyphenated form is matched by a compiled regex. Only
+    strings shaped like another spelling UUID() accepts (no hyphens, braces,
+    "urn:uuid:") fall back to UUID(); anything else, such as demo case IDs
+    like "case-1", is rejected without raising and catching ValueError.
+    
+    Args:
+        value: Candidate UUID string
+        
+    Returns:
+        The UUID, or None if value isn't a UUID
+    """
+    if not isinstance(value, str):
+        return None
+    if _UUID_RE.fullmatch(value):
+        return UUID(value)
+    if len(value) in _UUID_ALT_LENGTHS or value.startswith(("{", "urn:uuid:")):
+        try:
+            return UUID(value)
+        except ValueError:
+            return None
+    return None
+
 
 def validate_audio_file(file: UploadFile, max_size_mb: int = 10) -> None:
     """
@@ -12,9 +12,15 @@ CREATE TABLE IF NOT EXISTS cases (
     differential_diagnoses JSONB NOT NULL,
     red_flags TEXT[] NOT NULL DEFAULT '{}',
     learning_objectives TEXT[] NOT NULL DEFAULT '{}',
+    greeting_text TEXT,
+    greeting_audio_url TEXT,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW())
 );
 
+-- Precomputed session greeting (added after the initial schema)
+ALTER TABLE cases ADD COLUMN IF NOT EXISTS greeting_text TEXT;
+ALTER TABLE cases ADD COLUMN IF NOT EXISTS greeting_audio_url TEXT;
+
 -- Sessions table
 CREATE TABLE IF NOT EXISTS sessions (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -40,6 +46,19 @@ CREATE TABLE IF NOT EXISTS interactions (
     UNIQUE(session_id, interaction_number)
 );
 
+-- Case generation jobs (queued by /api/cases/generate/generate-with-k2)
+CREATE TABLE IF NOT EXISTS generation_jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'completed', 'failed')),
+    condition TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    requested_count INTEGER NOT NULL,
+    result JSONB,
+    error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW())
+);
+
 -- Indexes for better query performance
 CREATE INDEX IF NOT EXISTS idx_sessions_case_id ON sessions(case_id);
 CREATE INDEX IF NOT EXISTS idx_sessions_student_id ON sessions(student_id);
@@ -54,4 +73,5 @@ CREATE INDEX IF NOT EXISTS idx_interactions_timestamp ON interactions(timestamp)
 COMMENT ON TABLE cases IS 'Clinical cases for reasoning exercises';
 COMMENT ON TABLE sessions IS 'Student reasoning sessions';
 COMMENT ON TABLE interactions IS 'Individual student-tutor interactions within a session';
+COMMENT ON TABLE generation_jobs IS 'Background case generation jobs, polled by job id';
 COMMENT ON COLUMN interactions.reasoning_metadata IS 'Stores differential diagnoses, red flags identified, biases noted, etc.';
@@ -35,7 +35,12 @@ export const startSession = async (
     '/api/sessions/start',
     sessionData
   );
-  return response.data;
+  const data = response.data;
+  // Streamed greeting audio comes back as an API-relative path; hosted audio is already absolute
+  if (data.greeting_audio_url) {
+    data.greeting_audio_url = new URL(data.greeting_audio_url, api.defaults.baseURL).toString();
+  }
+  return data;
 };
 
 export const getSession = async (sessionId: string): Promise<any> => {
@@ -62,6 +62,8 @@ CREATE TABLE consultations (
     completed_at TIMESTAMP WITH TIME ZONE
 );
 
+CREATE INDEX idx_consultations_user_created ON consultations(user_id, created_at DESC);
+
 ALTER TABLE consultations ENABLE ROW LEVEL SECURITY;
 
 CREATE POLICY "Users can view own consultations" ON consultations